@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Índice das capturas gravadas em OUTPUT_DIR, por sessão (SQLite em
+<pasta de saída>/captures.sqlite3), usado por screenshot_cross_platform.py e
+screenshot_windows_auto.py.
+
+Cada captura vira uma linha com caminho, instante, posição do clique,
+geometria do monitor/região, título da janela, navegador, dimensões e bytes
+gravados, sha1 do arquivo e tempos (grab, codificação, clique -> gravado).
+Referências da supressão de duplicatas (.ref.json) entram com kind="ref" e o
+caminho da imagem original em `ref`.
+
+As entradas chegam de qualquer thread (callbacks do encoder) e são gravadas
+em lote por uma thread própria, numa transação a cada FLUSH_S segundos ou
+BATCH_MAX entradas. Consultas usam os índices por sessão, instante, título,
+monitor e hash, sem listar a pasta.
+
+Exemplos:
+  python capture_index.py prints --sessions
+  python capture_index.py prints --session 20240501-140307-4242
+  python capture_index.py prints --title-contains H2Maps --since 2024-05-01T14:00
+  python capture_index.py prints --monitor 1920,0 --last 20 --json
+"""
+
+import argparse
+import json
+import os
+import platform
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+INDEX_FILE = "captures.sqlite3"
+
+# Gravação em lote
+FLUSH_S = 1.0
+BATCH_MAX = 256
+
+COLUMNS = (
+    "session", "path", "kind", "ts", "click_x", "click_y",
+    "monitor_left", "monitor_top", "monitor_width", "monitor_height",
+    "title", "browser", "width", "height", "bytes", "sha1", "ref",
+    "grab_ms", "encode_ms", "total_ms",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session TEXT PRIMARY KEY,
+    started_at REAL NOT NULL,
+    script TEXT,
+    host TEXT
+);
+CREATE TABLE IF NOT EXISTS captures (
+    id INTEGER PRIMARY KEY,
+    session TEXT NOT NULL,
+    path TEXT NOT NULL,
+    kind TEXT,
+    ts REAL NOT NULL,
+    click_x INTEGER,
+    click_y INTEGER,
+    monitor_left INTEGER,
+    monitor_top INTEGER,
+    monitor_width INTEGER,
+    monitor_height INTEGER,
+    title TEXT,
+    browser TEXT,
+    width INTEGER,
+    height INTEGER,
+    bytes INTEGER,
+    sha1 TEXT,
+    ref TEXT,
+    grab_ms REAL,
+    encode_ms REAL,
+    total_ms REAL
+);
+CREATE INDEX IF NOT EXISTS captures_session_ts ON captures (session, ts);
+CREATE INDEX IF NOT EXISTS captures_ts ON captures (ts);
+CREATE INDEX IF NOT EXISTS captures_title ON captures (title);
+CREATE INDEX IF NOT EXISTS captures_monitor ON captures (monitor_left, monitor_top, ts);
+CREATE INDEX IF NOT EXISTS captures_sha1 ON captures (sha1);
+"""
+
+
+def index_path(location: str) -> str:
+    """Aceita a pasta de saída ou o próprio arquivo do índice."""
+    return os.path.join(location, INDEX_FILE) if os.path.isdir(location) else location
+
+
+def connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=5.0)
+    # WAL: consultas (ex: pelo CLI) não bloqueiam a gravação da sessão em andamento
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class CaptureIndex:
+    """Grava as entradas de uma sessão de captura no índice, em lote e fora do caminho do clique."""
+
+    def __init__(self, output_dir: str, script: str, session: Optional[str] = None,
+                 flush_s: float = FLUSH_S, batch_max: int = BATCH_MAX):
+        self.path = index_path(output_dir)
+        self.session = session or f"{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}"
+        self.flush_s = flush_s
+        self.batch_max = batch_max
+        conn = connect(self.path)
+        try:
+            with conn:
+                conn.executescript(SCHEMA)
+                conn.execute("INSERT OR IGNORE INTO sessions VALUES (?, ?, ?, ?)",
+                             (self.session, datetime.now().timestamp(), script, platform.node()))
+        finally:
+            conn.close()
+        self._queue: "queue.Queue[Optional[Dict[str, object]]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="capture-index", daemon=True)
+        self._thread.start()
+
+    def record(self, entry: Dict[str, object]) -> None:
+        """
+        Enfileira uma captura: chaves de COLUMNS, mais `click` (x, y) e
+        `monitor` ({left, top, width, height}) por conveniência.
+        """
+        self._queue.put(entry)
+
+    def _row(self, entry: Dict[str, object]) -> Tuple:
+        entry = dict(entry, session=self.session)
+        click = entry.pop("click", None)
+        if click is not None:
+            entry["click_x"], entry["click_y"] = int(click[0]), int(click[1])
+        monitor = entry.pop("monitor", None)
+        if monitor is not None:
+            for key in ("left", "top", "width", "height"):
+                entry[f"monitor_{key}"] = monitor[key]
+        return tuple(entry.get(column) for column in COLUMNS)
+
+    def _run(self) -> None:
+        conn = connect(self.path)
+        insert = f"INSERT INTO captures ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+        stopping = False
+        try:
+            while not stopping:
+                try:
+                    item = self._queue.get(timeout=self.flush_s)
+                except queue.Empty:
+                    continue
+                # Junta o que chegar em até FLUSH_S (ou BATCH_MAX) numa transação só
+                deadline = time.monotonic() + self.flush_s
+                rows = []
+                while True:
+                    if item is None:
+                        stopping = True
+                    else:
+                        rows.append(self._row(item))
+                    if stopping or len(rows) >= self.batch_max:
+                        break
+                    try:
+                        item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                if not rows:
+                    continue
+                try:
+                    with conn:
+                        conn.executemany(insert, rows)
+                except sqlite3.Error as e:
+                    print(f"[erro] Falha ao gravar {len(rows)} entrada(s) no índice {self.path}: {e}")
+        finally:
+            conn.close()
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Grava o que estiver pendente e encerra a thread."""
+        self._queue.put(None)
+        self._thread.join(timeout=timeout)
+
+
+def find(location: str, session: Optional[str] = None, title: Optional[str] = None,
+         title_contains: Optional[str] = None, monitor: Optional[Tuple[int, int]] = None,
+         since: Optional[float] = None, until: Optional[float] = None, sha1: Optional[str] = None,
+         last: Optional[int] = None) -> List[Dict[str, object]]:
+    """Capturas que atendem aos filtros, em ordem de instante."""
+    where, params = [], []
+    for clause, value in (("session = ?", session), ("title = ?", title), ("sha1 = ?", sha1),
+                          ("ts >= ?", since), ("ts < ?", until)):
+        if value is not None:
+            where.append(clause)
+            params.append(value)
+    if title_contains is not None:
+        where.append("title LIKE ?")
+        params.append(f"%{title_contains}%")
+    if monitor is not None:
+        where.append("monitor_left = ? AND monitor_top = ?")
+        params.extend(monitor)
+    sql = "SELECT * FROM captures" + (" WHERE " + " AND ".join(where) if where else "")
+    if last:
+        sql = f"SELECT * FROM ({sql} ORDER BY ts DESC LIMIT ?) ORDER BY ts"
+        params.append(last)
+    else:
+        sql += " ORDER BY ts"
+    conn = connect(index_path(location))
+    conn.row_factory = sqlite3.Row
+    try:
+        return [dict(row) for row in conn.execute(sql, params)]
+    finally:
+        conn.close()
+
+
+def sessions(location: str) -> List[Dict[str, object]]:
+    """Sessões do índice com contagem e intervalo das capturas."""
+    conn = connect(index_path(location))
+    conn.row_factory = sqlite3.Row
+    try:
+        return [dict(row) for row in conn.execute(
+            "SELECT s.session, s.script, s.host, s.started_at, COUNT(c.id) AS captures, "
+            "MIN(c.ts) AS first_ts, MAX(c.ts) AS last_ts "
+            "FROM sessions s LEFT JOIN captures c ON c.session = s.session "
+            "GROUP BY s.session ORDER BY s.started_at")]
+    finally:
+        conn.close()
+
+
+def _parse_time(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def _format_ts(ts: Optional[float]) -> str:
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3] if ts else "-"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("location", help=f"pasta de saída das capturas ou o arquivo {INDEX_FILE}")
+    parser.add_argument("--sessions", action="store_true", help="lista as sessões")
+    parser.add_argument("--session", help="só capturas desta sessão")
+    parser.add_argument("--title", help="título da janela exato")
+    parser.add_argument("--title-contains", help="parte do título da janela")
+    parser.add_argument("--monitor", help="monitor pela posição LEFT,TOP (ex: 1920,0)")
+    parser.add_argument("--since", help="a partir de (ISO 8601 ou epoch)")
+    parser.add_argument("--until", help="antes de (ISO 8601 ou epoch)")
+    parser.add_argument("--sha1", help="arquivo com este sha1")
+    parser.add_argument("--last", type=int, help="só as N capturas mais recentes")
+    parser.add_argument("--json", action="store_true", help="imprime em JSON")
+    args = parser.parse_args(argv)
+
+    path = index_path(args.location)
+    if not os.path.exists(path):
+        print(f"[erro] índice não encontrado: {path}", file=sys.stderr)
+        return 1
+    try:
+        if args.sessions:
+            rows = sessions(path)
+            if args.json:
+                print(json.dumps(rows, indent=2))
+                return 0
+            for row in rows:
+                print(f"{row['session']}  {row['script'] or '-':<28} {row['captures']:>6} captura(s)  "
+                      f"{_format_ts(row['first_ts'])} -> {_format_ts(row['last_ts'])}")
+            return 0
+        monitor = tuple(int(v) for v in args.monitor.split(",")) if args.monitor else None
+        rows = find(path, session=args.session, title=args.title, title_contains=args.title_contains,
+                    monitor=monitor, since=_parse_time(args.since) if args.since else None,
+                    until=_parse_time(args.until) if args.until else None, sha1=args.sha1, last=args.last)
+    except (sqlite3.Error, ValueError) as e:
+        print(f"[erro] {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+    for row in rows:
+        click = f"({row['click_x']},{row['click_y']})" if row["click_x"] is not None else "-"
+        size = f"{row['width']}x{row['height']}" if row["width"] else "-"
+        print(f"{_format_ts(row['ts'])}  {row['kind'] or '-':<8} {click:<14} {size:<10} "
+              f"{(row['title'] or '')[:40]:<40} {row['path']}")
+    print(f"{len(rows)} captura(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,9 @@
 """
-Arquivo de configuração para screenshot_windows_auto.py
+Configuração de screenshot_windows_auto.py
 
-Modifique as constantes abaixo para customizar o comportamento.
-Este arquivo é importado pelo script principal.
-
-Exemplo de uso no script:
-    from config_screenshot import *
+Modifique as constantes abaixo para customizar o comportamento. O script lê
+todas as configurações daqui (não há cópia dos valores no script); o arquivo
+precisa estar ao lado dele.
 """
 
 # ============================================================================
@@ -19,6 +17,10 @@ OUTPUT_DIR = "./prints"
 # Criar diretório automaticamente se não existir
 CREATE_DIR_IF_NOT_EXISTS = True
 
+# True = captura o monitor inteiro da janela ativa (inclui barra do Windows com data/hora)
+# False = captura apenas a janela ativa do navegador
+INCLUDE_WINDOWS_TASKBAR = True
+
 
 # ============================================================================
 # CONFIGURAÇÕES DE FILTROS
@@ -59,18 +61,65 @@ TITLE_FILTER_CASE_SENSITIVE = False
 #   DEBOUNCE_MS = 50    # Mais agressivo (permite capturas rápidas)
 DEBOUNCE_MS = 150
 
+# Cliques aguardando a thread de captura (o listener do mouse só enfileira);
+# com a fila cheia o clique novo é fundido ao último pendente
+CAPTURE_QUEUE_SIZE = 8
+
+# Modo rajada: sem debounce, para sequências rápidas de cliques (10+ capturas/s),
+# com fila de BURST_QUEUE_SIZE cliques; cada arquivo leva microssegundos +
+# número de sequência no nome, então capturas no mesmo segundo não se sobrescrevem
+BURST = False
+BURST_QUEUE_SIZE = 64
+
 
 # ============================================================================
 # CONFIGURAÇÕES DE QUALIDADE DE IMAGEM
 # ============================================================================
 
-# Qualidade PNG (não há compressão em PNG, mas pode afetar processamento)
-PNG_QUALITY = "high"  # "high", "medium", "low"
-
-# Formatos suportados para salvar (se modificar, atualizar no script)
-# Atualmente suportado: "png" (recomendado)
+# Formato de saída (ver image_pipeline.py)
+# Opções: "png" (sem perdas, recomendado), "webp-lossless" (sem perdas, menor),
+#         "webp" e "jpeg" (com perdas, bem menores)
 IMAGE_FORMAT = "png"
 
+# Esforço de compressão do PNG (o PNG é sempre sem perdas)
+# "high" = menor arquivo, mais lento | "medium" = padrão do Pillow
+# "low" = mais rápido, arquivo maior | ou um número de 0 a 9
+PNG_QUALITY = "medium"
+
+# Qualidade de "jpeg" (1-95) e "webp" (1-100)
+IMAGE_QUALITY = 90
+
+# Processos que codificam/gravam as imagens em paralelo
+# None = min(4, CPUs) | 0 = codifica no próprio listener (sem processos extras)
+ENCODE_WORKERS = None
+
+# Perfil de resolução: largura máxima da imagem gravada (redução no processo
+# que codifica). "full" (original) | "fhd" (1920) | "hd" (1280) | "compact" (960)
+PROFILE = "full"
+
+# Largura máxima explícita em pixels; > 0 tem precedência sobre PROFILE
+MAX_WIDTH = 0
+
+# Modo foco: captura só uma região FOCUS_WIDTH x FOCUS_HEIGHT em volta do
+# clique, limitada ao monitor/janela (bem menor que a tela inteira em 4K)
+FOCUS = False
+FOCUS_WIDTH = 1280
+FOCUS_HEIGHT = 720
+
+# Índice SQLite por sessão das capturas em OUTPUT_DIR/captures.sqlite3
+# (consulta: python capture_index.py prints --sessions)
+INDEX = True
+
+# Suprime capturas sem mudança visual: em vez de uma nova imagem, grava só
+# <nome>.ref.json apontando para a captura anterior da mesma região
+DEDUP = False
+
+# Variação de luminância (0-255) a partir da qual um bloco conta como mudado
+DEDUP_TOLERANCE = 4
+
+# Quantos blocos (grade de 32x32) podem mudar e ainda ser "a mesma tela"
+DEDUP_MAX_BLOCKS = 0
+
 
 # ============================================================================
 # CONFIGURAÇÕES DE NAVEGADORES CUSTOMIZADAS
@@ -89,45 +138,14 @@ CUSTOM_BROWSER_EXECUTABLES = {
 }
 
 
-# ============================================================================
-# CONFIGURAÇÕES DE CONSOLE E LOGS
-# ============================================================================
-
-# Mostrar mensagens de debug
-DEBUG_MODE = False
-
-# Verbose mode (mais detalhes)
-VERBOSE = False
-
-# Cores no console (Windows)
-USE_COLORS = True
-
-# Salvar log em arquivo
-LOG_TO_FILE = False
-LOG_FILE = "./screenshot_auto.log"
-
-
 # ============================================================================
 # CONFIGURAÇÕES AVANÇADAS
 # ============================================================================
 
-# Atalhos de teclado (placeholder - ver arquivo principal)
-# PAUSE_RESUME_KEY = keyboard.Key.p          # Ctrl+Shift+P
-# EXIT_KEY = keyboard.Key.q                  # Ctrl+Shift+Q
-
-# Incluir timestamp em microsegundos (mais precisão)
-INCLUDE_MICROSECONDS = False
-
-# Validar dimensões mínimas da janela antes de capturar
+# Dimensões mínimas da janela/região para capturar (ignora popups minúsculos)
 MIN_WINDOW_WIDTH = 100
 MIN_WINDOW_HEIGHT = 100
 
-# Timeout para operações de captura (segundos)
-CAPTURE_TIMEOUT = 5
-
-# Tentar recuperar de erros
-ERROR_RECOVERY = True
-
 
 # ============================================================================
 # PRESETS (Combinações prontas de configuração)
@@ -150,7 +168,6 @@ ERROR_RECOVERY = True
 # DEBOUNCE_MS = 500
 # OUTPUT_DIR = "./prints_all"
 
-# Preset: Debug mode com verbose
-# DEBUG_MODE = True
-# VERBOSE = True
+# Preset: Só a janela do navegador, sem a barra do Windows
+# INCLUDE_WINDOWS_TASKBAR = False
 # DEBOUNCE_MS = 300
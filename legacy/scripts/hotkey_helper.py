@@ -1,32 +1,386 @@
+import json
+import math
+import os
+import queue
+import random
+import socket
+import struct
+import tempfile
+import threading
+
 import requests
 import mouse
 import time
 
 BASE_URL = 'http://localhost:8010'
 
-def trigger():
-    try:
-        # Tenta obter posição atual do cursor na tela
-        try:
-            x, y = mouse.get_position()
-        except Exception:
-            x, y = None, None
-        r = requests.post(f'{BASE_URL}/trigger-add-step', json={'x': x, 'y': y}, timeout=1.5)
-        if r.ok:
-            print(f"Passo acionado: {r.json().get('ts')}")
+# Tamanho máximo da fila de cliques aguardando envio
+SEND_QUEUE_SIZE = 1000
+
+# Spool em disco para cliques não entregues (servidor fora do ar ou lento)
+SPOOL_FILE = os.environ.get('HOTKEY_SPOOL_FILE',
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hotkey_spool.jsonl'))
+SPOOL_MAX_EVENTS = int(os.environ.get('HOTKEY_SPOOL_MAX', '10000'))
+
+# Eventos por requisição ao esvaziar o spool (limite do servidor: TRIGGER_BATCH_MAX)
+SEND_BATCH_MAX = 200
+
+# Backoff exponencial entre tentativas de reenvio (segundos)
+RETRY_BASE_S = 0.5
+RETRY_MAX_S = 30.0
+
+# Transporte dos cliques: "http" (padrão) ou local, igual ao TRIGGER_IPC do servidor:
+#   udp:127.0.0.1:8011  |  unix:/tmp/homolog-trigger.sock
+# Se o envio local falhar ou não for confirmado, o clique segue por HTTP.
+TRANSPORT = os.environ.get('HOTKEY_TRANSPORT', 'http')
+
+# Tempo máximo (segundos) aguardando a confirmação do servidor no transporte local
+IPC_ACK_TIMEOUT_S = float(os.environ.get('HOTKEY_IPC_ACK_TIMEOUT', '0.5'))
+
+# Envios locais seguidos sem confirmação até desistir do transporte local e
+# usar só HTTP (ex: servidor sem TRIGGER_IPC)
+IPC_MAX_FAILURES = 3
+
+# Mensagem binária do transporte local, versão 1 e versão 2 com rastreamento
+# (cópia de legacy/server/trigger_ipc.py)
+IPC_MESSAGE = struct.Struct('<2sBBddd')
+IPC_TRACED_MESSAGE = struct.Struct('<2sBBddd8sdd')
+IPC_ACK = struct.Struct('<2sB8sq')
+
+
+class IpcTransport:
+    """
+    Envia triggers como datagramas binários e aguarda a confirmação do
+    servidor: um datagrama sem confirmação pode ter se perdido (com UDP, uma
+    porta sem listener só vira erro no envio seguinte).
+    """
+
+    def __init__(self, spec, ack_timeout=IPC_ACK_TIMEOUT_S):
+        kind, _, rest = spec.partition(':')
+        self._path = None
+        if kind == 'udp':
+            host, _, port = rest.rpartition(':')
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._sock.connect((host or '127.0.0.1', int(port)))
+        elif kind == 'unix':
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            # Socket unix de datagramas só recebe a confirmação se tiver endereço
+            self._path = os.path.join(tempfile.gettempdir(), f'hotkey-helper-{os.getpid()}.sock')
+            if os.path.exists(self._path):
+                os.remove(self._path)
+            self._sock.bind(self._path)
+            self._sock.connect(rest)
         else:
+            raise ValueError(f'HOTKEY_TRANSPORT inválido: {spec}')
+        self._ack_timeout = ack_timeout
+
+    @staticmethod
+    def encode(event):
+        flags = 0
+        values = []
+        for bit, name in enumerate(('x', 'y', 'client_ts')):
+            value = event.get(name)
+            if value is None:
+                values.append(0.0)
+                continue
+            flags |= 1 << bit
+            if isinstance(value, int):
+                flags |= 8 << bit
+            values.append(float(value))
+        if 'trace_id' not in event:
+            # Evento de um spool antigo, sem rastreamento
+            return IPC_MESSAGE.pack(b'HT', 1, flags, *values)
+        monos = [float(event.get(name, math.nan)) for name in ('client_mono', 'sent_mono')]
+        return IPC_TRACED_MESSAGE.pack(b'HT', 2, flags, *values, bytes.fromhex(event['trace_id']), *monos)
+
+    def send(self, event):
+        """
+        Envia o evento e retorna o seq confirmado pelo servidor. Levanta
+        OSError (inclusive timeout) se não houver confirmação.
+        """
+        trace_id = bytes.fromhex(event['trace_id']) if 'trace_id' in event else bytes(8)
+        self._sock.send(self.encode(event))
+        deadline = time.monotonic() + self._ack_timeout
+        while True:
+            self._sock.settimeout(max(0.001, deadline - time.monotonic()))
+            data = self._sock.recv(IPC_ACK.size + 1)
+            if len(data) != IPC_ACK.size:
+                continue
+            magic, version, acked, seq = IPC_ACK.unpack(data)
+            # Confirmação atrasada de um envio anterior que já expirou: ignorar
+            if magic == b'HA' and version == 1 and acked == trace_id:
+                return seq
+
+    def close(self):
+        self._sock.close()
+        if self._path is not None and os.path.exists(self._path):
+            os.remove(self._path)
+
+
+class TriggerSpool:
+    """
+    Fila persistente (JSON lines) de eventos {x, y, client_ts} ainda não
+    entregues. Limitada a `max_events`: ao exceder, descarta os mais antigos.
+    """
+
+    def __init__(self, path=SPOOL_FILE, max_events=SPOOL_MAX_EVENTS):
+        self.path = path
+        self.max_events = max_events
+        self.discarded = 0
+        self._events = []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        self._events.append(json.loads(line))
+                    except ValueError:
+                        pass  # linha truncada por encerramento abrupto
+        except FileNotFoundError:
+            pass
+        self._trim()
+
+    def __len__(self):
+        return len(self._events)
+
+    def _trim(self):
+        excess = len(self._events) - self.max_events
+        if excess > 0:
+            del self._events[:excess]
+            self.discarded += excess
+            self._rewrite()
+        return excess > 0
+
+    def _rewrite(self):
+        if not self._events:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(e) + '\n' for e in self._events)
+        os.replace(tmp_path, self.path)
+
+    def append(self, events):
+        if not events:
+            return
+        self._events.extend(events)
+        if not self._trim():
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.writelines(json.dumps(e) + '\n' for e in events)
+
+    def peek(self, n):
+        return self._events[:n]
+
+    def remove_first(self, n):
+        del self._events[:n]
+        self._rewrite()
+
+
+class TriggerSender:
+    """
+    Envia os triggers numa thread de fundo, com uma requests.Session
+    (conexão keep-alive reaproveitada). O callback do hook do mouse só
+    enfileira o clique e retorna imediatamente.
+
+    Se o servidor não responder, os cliques vão para o spool em disco e são
+    reenviados em lotes (/trigger-add-steps) com backoff exponencial e jitter,
+    sempre na ordem original.
+    """
+
+    def __init__(self, base_url=BASE_URL, timeout=1.5, spool=None, transport=TRANSPORT):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.spool = spool if spool is not None else TriggerSpool()
+        self.ipc = None
+        self._ipc_failures = 0
+        if transport != 'http':
+            try:
+                self.ipc = IpcTransport(transport)
+            except (OSError, ValueError) as e:
+                print(f'Transporte {transport} indisponível ({e}); usando HTTP.')
+        self._queue = queue.Queue(maxsize=SEND_QUEUE_SIZE)
+        self._session = requests.Session()
+        self._thread = threading.Thread(target=self._run, name='trigger-sender', daemon=True)
+        self._retry_attempt = 0
+        self._next_retry = 0.0
+        # Latência (s) do clique até a resposta do servidor, por envio bem-sucedido
+        self.latencies = []
+        self.failed = 0
+        self.dropped = 0
+
+    def start(self):
+        if len(self.spool):
+            print(f'{len(self.spool)} passo(s) pendente(s) no spool serão reenviados.')
+        self._thread.start()
+
+    def submit(self, x, y):
+        """Chamado no hook do mouse: só registra o clique na fila."""
+        # trace_id + relógio monotônico: o servidor mede cada trecho (TRIGGER_TRACE)
+        event = {'x': x, 'y': y, 'client_ts': int(time.time() * 1000),
+                 'trace_id': os.urandom(8).hex(), 'client_mono': time.monotonic() * 1000}
+        try:
+            self._queue.put_nowait((time.perf_counter(), event))
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        """Envia o que ainda estiver na fila e encerra a thread."""
+        self._queue.put(None)
+        self._thread.join(timeout=self.timeout * 2)
+        self._session.close()
+        if self.ipc is not None:
+            self.ipc.close()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            # Com spool pendente, acordar também quando o backoff expirar
+            try:
+                if len(self.spool):
+                    item = self._queue.get(timeout=max(0.0, self._next_retry - time.monotonic()))
+                else:
+                    item = self._queue.get()
+            except queue.Empty:
+                item = ()
+
+            batch = []
+            while True:
+                if item is None:
+                    stopping = True
+                elif item:
+                    batch.append(item)
+                if len(batch) >= SEND_BATCH_MAX:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if time.monotonic() < self._next_retry:
+                # Ainda em backoff: persistir e esperar a próxima tentativa
+                self.spool.append([event for _, event in batch])
+                continue
+            self._flush(batch)
+
+    def _flush(self, batch):
+        """Esvazia o spool (mais antigos primeiro) e depois envia `batch`."""
+        while len(self.spool):
+            chunk = self.spool.peek(SEND_BATCH_MAX)
+            result = self._post([(None, event) for event in chunk])
+            if result == 'retry':
+                self.spool.append([event for _, event in batch])
+                return
+            self.spool.remove_first(len(chunk))
+        if batch and self._post(batch) == 'retry':
+            self.spool.append([event for _, event in batch])
+
+    def _schedule_retry(self):
+        delay = min(RETRY_MAX_S, RETRY_BASE_S * 2 ** self._retry_attempt)
+        # Jitter: helpers reconectando juntos não disparam todos ao mesmo tempo
+        delay *= random.uniform(0.5, 1.0)
+        self._retry_attempt += 1
+        self._next_retry = time.monotonic() + delay
+        print(f'Servidor indisponível; passos guardados no spool, nova tentativa em {delay:.1f}s')
+
+    def _post(self, items):
+        """
+        Envia os itens (perf_counter do clique ou None, evento). Retorna 'ok',
+        'retry' (falha de conexão/5xx) ou 'drop' (rejeitado pelo servidor).
+        """
+        events = [event for _, event in items]
+        sent_mono = time.monotonic() * 1000
+        for event in events:
+            event['sent_mono'] = sent_mono
+        # Só cliques novos vão pelo transporte local; o spool sempre usa HTTP
+        if self.ipc is not None and len(items) == 1 and items[0][0] is not None:
+            clicked_at, event = items[0]
+            try:
+                seq = self.ipc.send(event)
+            except OSError as e:
+                # Sem confirmação o clique pode não ter chegado: segue por HTTP
+                # (mesmo trace_id; o servidor ignora se o datagrama já foi gravado)
+                print('Transporte local sem confirmação, usando HTTP:', e)
+                self._ipc_failures += 1
+                if self._ipc_failures >= IPC_MAX_FAILURES:
+                    print(f'{self._ipc_failures} envios locais seguidos sem confirmação; usando só HTTP.')
+                    self.ipc.close()
+                    self.ipc = None
+            else:
+                self._ipc_failures = 0
+                self._retry_attempt = 0
+                self.latencies.append(time.perf_counter() - clicked_at)
+                print(f'Passo acionado (ipc): seq={seq}')
+                return 'ok'
+        try:
+            if len(events) == 1:
+                r = self._session.post(f'{self.base_url}/trigger-add-step', json=events[0], timeout=self.timeout)
+            else:
+                r = self._session.post(f'{self.base_url}/trigger-add-steps', json=events, timeout=self.timeout)
+        except Exception as e:
+            self.failed += len(events)
+            print('Erro ao acionar passo:', e)
+            self._schedule_retry()
+            return 'retry'
+
+        if r.status_code >= 500:
+            self.failed += len(events)
             print('Falha ao acionar passo:', r.status_code)
-    except Exception as e:
-        print('Erro ao acionar passo:', e)
+            self._schedule_retry()
+            return 'retry'
+        if not r.ok:
+            self.failed += len(events)
+            print(f'Passo(s) rejeitado(s) pelo servidor ({r.status_code}), descartando {len(events)}')
+            return 'drop'
+
+        self._retry_attempt = 0
+        now_perf, now_ms = time.perf_counter(), time.time() * 1000
+        for clicked_at, event in items:
+            # Eventos vindos do spool não têm perf_counter: usar client_ts
+            if clicked_at is not None:
+                self.latencies.append(now_perf - clicked_at)
+            else:
+                self.latencies.append(max(0.0, now_ms - event['client_ts']) / 1000)
+        body = r.json()
+        if len(events) == 1:
+            print(f"Passo acionado: {body.get('ts')}")
+        else:
+            print(f"{body.get('count')} passos acionados em lote")
+        return 'ok'
+
+    def print_stats(self):
+        values = sorted(v * 1000 for v in self.latencies)
+        print(f'Enviados: {len(values)} | Falhas: {self.failed} | Descartados (fila cheia): {self.dropped} '
+              f'| Pendentes no spool: {len(self.spool)}')
+        if not values:
+            return
+
+        def pct(p):
+            return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+        print(f'Latência clique->servidor (ms): p50={pct(50):.1f} p95={pct(95):.1f} '
+              f'p99={pct(99):.1f} max={values[-1]:.1f} média={sum(values) / len(values):.1f}')
+
+
+def trigger(sender):
+    # Tenta obter posição atual do cursor na tela
+    try:
+        x, y = mouse.get_position()
+    except Exception:
+        x, y = None, None
+    sender.submit(x, y)
 
 def main():
+    sender = TriggerSender()
+    sender.start()
     print('Clique com o botão direito para criar um passo.')
     print('Pressione Ctrl+C para sair.')
-    mouse.on_right_click(lambda: trigger())
+    mouse.on_right_click(lambda: trigger(sender))
     try:
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
+        sender.stop()
+        sender.print_stats()
         print('Encerrado.')
 
 if __name__ == '__main__':
@@ -0,0 +1,637 @@
+"""
+Pipeline de codificação/gravação de screenshots, compartilhado por
+screenshot_cross_platform.py e screenshot_windows_auto.py.
+
+A thread de captura só faz o grab e entrega o frame a um pool de processos,
+que codifica (PNG/JPEG/WebP) e grava o arquivo de forma atômica (arquivo
+temporário na mesma pasta + os.replace): quem lê a pasta nunca vê uma
+imagem pela metade. Vários cliques seguidos codificam em paralelo.
+
+Formatos (IMAGE_FORMAT / SCREENSHOT_FORMAT):
+  png            - sem perdas; PNG_QUALITY define o esforço de compressão
+  jpeg           - com perdas; IMAGE_QUALITY 1-95
+  webp           - com perdas; IMAGE_QUALITY 1-100
+  webp-lossless  - sem perdas, em geral menor que o PNG
+
+PNG_QUALITY: "high" (compress_level 9, menor arquivo), "medium" (6, padrão
+do Pillow), "low" (1, mais rápido) ou um número de 0 a 9.
+
+Caminho do frame: o buffer BGRA cru do mss (ScreenShot.raw) vai como Frame,
+sem o `.rgb` do mss nem Image.frombytes na thread de captura. Para o pool ele
+é copiado uma única vez (memcpy) num bloco de memória compartilhada
+reaproveitado (FrameBufferPool); o processo que codifica lê direto do bloco e
+converte BGRX -> RGB no decoder "raw" do Pillow, em C. O destaque do clique
+(`pointer`) é desenhado nesse processo.
+
+Perfis de resolução (CAPTURE_PROFILES / SCREENSHOT_PROFILE): a imagem é
+reduzida no processo que codifica para uma largura máxima (Lanczos, com um
+reduce() inteiro em C antes). O modo foco (focus_region) captura só uma
+região em volta do clique, limitada ao monitor/janela.
+
+Anotações vetoriais: em vez de desenhar o destaque do clique nos pixels, o
+encoder pode gravar a imagem limpa + `<nome>.annot.json` (posição, raio, cor,
+traço do clique em pixels da imagem gravada e a geometria do monitor).
+AnnotationRenderer compõe o destaque só na exportação/miniatura, com cache.
+
+Supressão de duplicatas (DuplicateFilter): antes de codificar, um hash de
+blocos (grade de luminância reduzida) do frame é comparado com o da captura
+anterior do mesmo monitor/janela. Se quase nada mudou, em vez de uma nova
+imagem grava-se só um arquivo de referência `<nome>.ref.json` apontando para
+a imagem anterior, sem passar pelo encoder.
+
+Fila de cliques (ClickQueue): o listener do mouse só enfileira o clique; uma
+thread de captura faz o grab. Com a fila cheia, o clique novo é fundido ao
+último pendente em vez de bloquear o hook ou ser descartado.
+"""
+import hashlib
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from PIL import Image, ImageDraw
+
+# formato -> (formato do Pillow, extensão)
+FORMATS: Dict[str, Tuple[str, str]] = {
+    "png": ("PNG", ".png"),
+    "jpeg": ("JPEG", ".jpg"),
+    "jpg": ("JPEG", ".jpg"),
+    "webp": ("WEBP", ".webp"),
+    "webp-lossless": ("WEBP", ".webp"),
+}
+
+PNG_COMPRESS_LEVELS = {"high": 9, "medium": 6, "low": 1}
+
+# Largura máxima da imagem gravada por perfil (None = resolução do grab)
+CAPTURE_PROFILES: Dict[str, Optional[int]] = {
+    "full": None,
+    "fhd": 1920,
+    "hd": 1280,
+    "compact": 960,
+}
+
+
+def save_options(image_format: str = "png",
+                 png_quality: Union[str, int] = "medium",
+                 quality: int = 90) -> Tuple[str, str, Dict[str, object]]:
+    """Resolve (formato do Pillow, extensão, parâmetros do save) para a configuração."""
+    fmt = image_format.lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"formato de imagem inválido: {image_format} (use {', '.join(FORMATS)})")
+    pil_format, ext = FORMATS[fmt]
+    if fmt == "png":
+        level = PNG_COMPRESS_LEVELS.get(str(png_quality).lower())
+        if level is None:
+            level = max(0, min(9, int(png_quality)))
+        return pil_format, ext, {"compress_level": level}
+    if fmt == "webp-lossless":
+        return pil_format, ext, {"lossless": True}
+    if pil_format == "JPEG":
+        return pil_format, ext, {"quality": max(1, min(95, quality)), "optimize": False}
+    return pil_format, ext, {"quality": max(1, min(100, quality))}
+
+
+def profile_width(profile: str = "full", max_width: Optional[int] = None) -> Optional[int]:
+    """Largura máxima de saída: `max_width` explícito ou a do perfil."""
+    if max_width:
+        return max_width
+    key = profile.lower()
+    if key not in CAPTURE_PROFILES:
+        raise ValueError(f"Perfil de captura inválido: {profile} (use {', '.join(CAPTURE_PROFILES)})")
+    return CAPTURE_PROFILES[key]
+
+
+def focus_region(bounds: Dict[str, int], click_pos: Tuple[int, int],
+                 width: int, height: int) -> Dict[str, int]:
+    """
+    Região `width` x `height` centrada no clique (coordenadas globais),
+    deslocada/limitada para caber em `bounds` (monitor ou janela).
+    """
+    width, height = min(width, bounds["width"]), min(height, bounds["height"])
+    left = min(max(click_pos[0] - width // 2, bounds["left"]), bounds["left"] + bounds["width"] - width)
+    top = min(max(click_pos[1] - height // 2, bounds["top"]), bounds["top"] + bounds["height"] - height)
+    return {"left": left, "top": top, "width": width, "height": height}
+
+
+def fit_width(img: Image.Image, max_width: Optional[int],
+              pointer: Optional[Dict[str, object]] = None) -> Tuple[Image.Image, Optional[Dict[str, object]]]:
+    """Reduz `img` para no máximo `max_width` de largura; o destaque acompanha a escala."""
+    if not max_width or img.width <= max_width:
+        return img, pointer
+    scale = max_width / img.width
+    # reducing_gap: reduce() inteiro em C e Lanczos só no último fator
+    img = img.resize((max_width, max(1, round(img.height * scale))), Image.LANCZOS, reducing_gap=3.0)
+    if pointer:
+        pointer = dict(pointer, x=round(pointer["x"] * scale), y=round(pointer["y"] * scale))
+    return img, pointer
+
+
+# Resultado de cada gravação: (path, bytes gravados, {width, height, sha1, encode_ms})
+Saved = Tuple[str, int, Dict[str, object]]
+
+
+def file_sha1(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_atomic(img: Image.Image, path: str, pil_format: str, params: Dict[str, object]) -> int:
+    """Grava `img` em `path` via arquivo temporário + os.replace; retorna o tamanho em bytes."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        img.save(tmp_path, format=pil_format, **params)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return os.path.getsize(path)
+
+
+class Frame:
+    """Frame cru do mss: bytes BGRA (4 bytes por pixel, sem padding) + tamanho."""
+    __slots__ = ("data", "size")
+
+    def __init__(self, data, size: Tuple[int, int]):
+        self.data = data
+        self.size = size
+
+    @property
+    def nbytes(self) -> int:
+        return self.size[0] * self.size[1] * 4
+
+    def to_image(self) -> Image.Image:
+        # Uma passada em C: BGRX -> RGB (o canal alfa do mss é ignorado)
+        return Image.frombuffer("RGB", self.size, self.data, "raw", "BGRX", 0, 1)
+
+
+class CaptureNamer:
+    """
+    Nomes de arquivo sem colisão, mesmo com várias capturas por segundo:
+    data/hora com microssegundos + número de sequência monotônico da sessão
+    (ex: screen_cursor_2024-05-01_14-03-07-123456_00042.png).
+    """
+
+    def __init__(self):
+        self._seq = itertools.count(1)
+
+    def name(self, prefix: str, extension: str, when: Optional[float] = None) -> str:
+        """`when`: instante (time.time()) da captura; padrão agora."""
+        stamp = datetime.now() if when is None else datetime.fromtimestamp(when)
+        return f"{prefix}_{stamp:%Y-%m-%d_%H-%M-%S-%f}_{next(self._seq):05d}{extension}"
+
+
+def write_reference(path: str, ref_path: str, info: Optional[Dict[str, object]] = None) -> str:
+    """
+    Grava (atomicamente) `<path sem extensão>.ref.json` apontando para
+    `ref_path`, uma imagem já salva idêntica à que seria gravada.
+    """
+    ref_file = os.path.splitext(path)[0] + ".ref.json"
+    data = {"ref": os.path.basename(ref_path), **(info or {})}
+    tmp_path = f"{ref_file}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, ref_file)
+    return ref_file
+
+
+class DuplicateFilter:
+    """
+    Detecta frames quase iguais ao anterior de cada chave (monitor/janela).
+
+    O hash é a luminância média de uma grade `grid x grid` de blocos. Um bloco
+    mudou se a média variou mais que `tolerance` (0-255); o frame é duplicado
+    se no máximo `max_changed` blocos mudaram.
+    """
+
+    def __init__(self, grid: int = 32, tolerance: int = 4, max_changed: int = 0):
+        self.grid = grid
+        self.tolerance = tolerance
+        self.max_changed = max_changed
+        # chave -> (hash, caminho, instante da captura); remember() vem dos callbacks do encoder
+        self._last: Dict[object, Tuple[bytes, str, float]] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._last
+
+    def clear(self) -> None:
+        """Esquece as referências (a próxima captura de cada chave é sempre nova)."""
+        with self._lock:
+            self._last.clear()
+
+    def block_hash(self, img: Union[Image.Image, Frame]) -> bytes:
+        if isinstance(img, Frame):
+            # Mapeia o buffer sem copiar; R e B trocados não afetam a comparação
+            img = Image.frombuffer("RGBX", img.size, img.data, "raw", "RGBX", 0, 1)
+        factor = max(1, min(img.size) // (self.grid * 4))
+        if factor > 1:
+            img = img.reduce(factor)
+        return img.resize((self.grid, self.grid), Image.BOX).convert("L").tobytes()
+
+    def changed_blocks(self, a: bytes, b: bytes) -> int:
+        tolerance = self.tolerance
+        return sum(1 for x, y in zip(a, b) if abs(x - y) > tolerance)
+
+    def lookup(self, key: object, img: Union[Image.Image, Frame]) -> Tuple[bytes, Optional[str]]:
+        """(hash do frame, caminho da imagem anterior se for duplicado ou None)."""
+        digest = self.block_hash(img)
+        with self._lock:
+            last = self._last.get(key)
+        if last is not None and self.changed_blocks(digest, last[0]) <= self.max_changed:
+            return digest, last[1]
+        return digest, None
+
+    def remember(self, key: object, digest: bytes, path: str, taken_at: float) -> None:
+        """
+        Registra a imagem como referência para as próximas comparações. Chamar
+        só depois de a gravação terminar com sucesso (uma referência nunca
+        aponta para um arquivo que não existe); gravações que terminam fora de
+        ordem não substituem uma captura mais recente da mesma chave.
+        """
+        with self._lock:
+            last = self._last.get(key)
+            if last is None or last[2] <= taken_at:
+                self._last[key] = (digest, path, taken_at)
+
+
+def annotations_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".annot.json"
+
+
+def write_annotations(path: str, size: Tuple[int, int], pointers: List[Dict[str, object]],
+                      info: Optional[Dict[str, object]] = None) -> str:
+    """
+    Grava (atomicamente) o sidecar de anotações da imagem `path`: tamanho da
+    imagem gravada, cliques em pixels dela e `info` (ex: geometria do monitor).
+    """
+    data = {"image": os.path.basename(path), "size": list(size),
+            "annotations": [dict(pointer, type="click") for pointer in pointers], **(info or {})}
+    sidecar = annotations_path(path)
+    tmp_path = f"{sidecar}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, sidecar)
+    return sidecar
+
+
+def read_annotations(path: str) -> Optional[Dict[str, object]]:
+    """Sidecar da imagem `path`, ou None se ela não tiver anotações."""
+    try:
+        with open(annotations_path(path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def draw_pointer(img: Image.Image, pointer: Optional[Dict[str, object]]) -> None:
+    """Desenha o círculo do clique; `pointer` = {x, y, radius, color, stroke} relativo à imagem."""
+    if not pointer:
+        return
+    x, y, r = pointer["x"], pointer["y"], pointer["radius"]
+    if x < 0 or y < 0 or x >= img.width or y >= img.height:
+        return
+    ImageDraw.Draw(img).ellipse([(x - r, y - r), (x + r, y + r)],
+                                outline=pointer["color"], width=pointer["stroke"])
+
+
+class OverviewCanvas:
+    """
+    Imagem única e reduzida da área virtual de todos os monitores
+    (`bounds` = mss.monitors[0]), montada a partir dos frames de cada monitor
+    conforme chegam, em qualquer thread; só a versão reduzida fica na memória.
+    """
+
+    def __init__(self, bounds: Dict[str, int], max_width: int):
+        self.left, self.top = bounds["left"], bounds["top"]
+        self.scale = min(1.0, max_width / bounds["width"])
+        size = (max(1, round(bounds["width"] * self.scale)), max(1, round(bounds["height"] * self.scale)))
+        self.image = Image.new("RGB", size)
+        self.pointers: List[Dict[str, object]] = []
+        self._lock = threading.Lock()
+
+    def paste(self, left: int, top: int, img: Union[Image.Image, Frame],
+              pointer: Optional[Dict[str, object]] = None) -> None:
+        """Cola o frame do monitor na posição (left, top) da área virtual."""
+        if isinstance(img, Frame):
+            img = img.to_image()
+        x, y = round((left - self.left) * self.scale), round((top - self.top) * self.scale)
+        size = (max(1, round(img.width * self.scale)), max(1, round(img.height * self.scale)))
+        # reducing_gap: reduce() inteiro em C antes do filtro, bem mais rápido que LANCZOS direto
+        small = img.resize(size, Image.BOX, reducing_gap=2.0) if size != img.size else img
+        with self._lock:
+            self.image.paste(small, (x, y))
+            if pointer:
+                self.pointers.append(dict(pointer, x=x + round(pointer["x"] * self.scale),
+                                           y=y + round(pointer["y"] * self.scale)))
+
+    def finish(self, draw: bool = True) -> Image.Image:
+        """Imagem final, com o destaque dos cliques desenhado (ou não, para sidecar)."""
+        if draw:
+            for pointer in self.pointers:
+                draw_pointer(self.image, pointer)
+        return self.image
+
+
+class AnnotationRenderer:
+    """
+    Compõe as anotações do sidecar sobre a imagem limpa, sob demanda (export
+    ou miniatura com `max_width`). O resultado fica em `cache_dir`, com chave
+    pela imagem (caminho, mtime, tamanho), anotações, estilo e largura: pedir
+    de novo só devolve o arquivo já renderizado.
+    """
+
+    def __init__(self, cache_dir: str, image_format: str = "png",
+                 png_quality: Union[str, int] = "low", quality: int = 85):
+        self.cache_dir = cache_dir
+        self.pil_format, self.extension, self.params = save_options(image_format, png_quality, quality)
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def render(self, image_path: str, max_width: Optional[int] = None,
+               style: Optional[Dict[str, object]] = None) -> str:
+        """
+        Caminho da imagem com as anotações desenhadas. `style` sobrescreve
+        color/radius/stroke de todas as anotações.
+        """
+        annotations = read_annotations(image_path) or {}
+        stat = os.stat(image_path)
+        key = hashlib.sha1(json.dumps([os.path.abspath(image_path), stat.st_mtime_ns, stat.st_size,
+                                       annotations, style, max_width], sort_keys=True).encode()).hexdigest()[:16]
+        stem = os.path.splitext(os.path.basename(image_path))[0]
+        out_path = os.path.join(self.cache_dir, f"{stem}_{key}{self.extension}")
+        if os.path.exists(out_path):
+            return out_path
+
+        with Image.open(image_path) as src:
+            if max_width and src.width > max_width:
+                # JPEG: decodifica já reduzido (DCT), sem passar pela resolução cheia
+                src.draft("RGB", (max_width, src.height * max_width // src.width))
+            img = src.convert("RGB")
+        saved_width = annotations.get("size", [img.width])[0] or img.width
+        img, _ = fit_width(img, max_width)
+        scale = img.width / saved_width
+        for pointer in annotations.get("annotations", []):
+            pointer = dict(pointer, **(style or {}))
+            if scale != 1:
+                pointer.update(x=round(pointer["x"] * scale), y=round(pointer["y"] * scale),
+                               radius=max(2, round(pointer["radius"] * scale)),
+                               stroke=max(1, round(pointer["stroke"] * scale)))
+            draw_pointer(img, pointer)
+        write_atomic(img, out_path, self.pil_format, self.params)
+        return out_path
+
+
+class FrameBufferPool:
+    """
+    Blocos de memória compartilhada reaproveitados entre capturas, criados sob
+    demanda (ou via reserve()) até `max_slots`. Um bloco fica ocupado enquanto
+    o processo de codificação lê o frame.
+    """
+
+    def __init__(self, max_slots: int = 4):
+        self.max_slots = max_slots
+        self._lock = threading.Lock()
+        self._free: List[shared_memory.SharedMemory] = []
+        self._busy = 0
+
+    def reserve(self, nbytes: int) -> None:
+        """Pré-aloca um bloco (ex: do tamanho do maior monitor) fora do caminho do clique."""
+        with self._lock:
+            if self._busy + len(self._free) < self.max_slots:
+                self._free.append(shared_memory.SharedMemory(create=True, size=nbytes))
+
+    def acquire(self, nbytes: int) -> Optional[shared_memory.SharedMemory]:
+        """Retorna um bloco livre com pelo menos `nbytes`, ou None se todos estiverem ocupados."""
+        with self._lock:
+            for i, shm in enumerate(self._free):
+                if shm.size >= nbytes:
+                    self._busy += 1
+                    return self._free.pop(i)
+            if self._busy + len(self._free) >= self.max_slots:
+                if not self._free:
+                    return None
+                # Resolução maior que os blocos livres: trocar o menor por um novo
+                small = self._free.pop(0)
+                small.close()
+                small.unlink()
+            self._busy += 1
+        return shared_memory.SharedMemory(create=True, size=nbytes)
+
+    def release(self, shm: shared_memory.SharedMemory) -> None:
+        with self._lock:
+            self._busy -= 1
+            self._free.append(shm)
+            self._free.sort(key=lambda block: block.size)
+
+    def close(self) -> None:
+        with self._lock:
+            for shm in self._free:
+                shm.close()
+                shm.unlink()
+            self._free.clear()
+
+
+# Blocos já abertos neste processo do pool (nome -> SharedMemory)
+_attached: Dict[str, shared_memory.SharedMemory] = {}
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    shm = _attached.get(name)
+    if shm is None:
+        # Abrir sem registrar no resource_tracker: ele apagaria o bloco quando
+        # este processo encerrasse, mas quem cria e remove é o FrameBufferPool
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+        except TypeError:
+            from multiprocessing import resource_tracker
+            register = resource_tracker.register
+            resource_tracker.register = lambda *args: None
+            try:
+                shm = shared_memory.SharedMemory(name=name)
+            finally:
+                resource_tracker.register = register
+        _attached[name] = shm
+    return shm
+
+
+def _finish(img: Image.Image, path: str, pil_format: str, params: Dict[str, object],
+            pointer: Optional[Dict[str, object]], max_width: Optional[int],
+            sidecar: Optional[Dict[str, object]], started: float) -> Saved:
+    # Redimensiona e grava; o destaque vai nos pixels ou, com `sidecar`, no .annot.json
+    img, pointer = fit_width(img, max_width, pointer)
+    if sidecar is None:
+        draw_pointer(img, pointer)
+    size = write_atomic(img, path, pil_format, params)
+    if sidecar is not None:
+        write_annotations(path, img.size, [pointer] if pointer else [], sidecar)
+    # sha1 relendo o arquivo recém-gravado (ainda no cache do sistema)
+    return path, size, {"width": img.width, "height": img.height, "sha1": file_sha1(path),
+                        "encode_ms": (time.perf_counter() - started) * 1000}
+
+
+def _encode_job(mode: str, size: Tuple[int, int], data: bytes, path: str,
+                pil_format: str, params: Dict[str, object],
+                pointer: Optional[Dict[str, object]] = None,
+                max_width: Optional[int] = None,
+                sidecar: Optional[Dict[str, object]] = None) -> Saved:
+    # Roda no processo do pool
+    started = time.perf_counter()
+    return _finish(Image.frombytes(mode, size, data), path, pil_format, params, pointer, max_width, sidecar,
+                   started)
+
+
+def _encode_frame_job(shm_name: Optional[str], data, size: Tuple[int, int], path: str,
+                      pil_format: str, params: Dict[str, object],
+                      pointer: Optional[Dict[str, object]],
+                      max_width: Optional[int] = None,
+                      sidecar: Optional[Dict[str, object]] = None) -> Saved:
+    # Roda no processo do pool; o frame vem do bloco compartilhado ou, sem
+    # bloco livre, nos próprios argumentos
+    started = time.perf_counter()
+    if shm_name is not None:
+        view = _attach(shm_name).buf[:size[0] * size[1] * 4]
+        try:
+            img = Frame(view, size).to_image()
+        finally:
+            view.release()
+    else:
+        img = Frame(data, size).to_image()
+    return _finish(img, path, pil_format, params, pointer, max_width, sidecar, started)
+
+
+def _warm_up() -> None:
+    pass
+
+
+# Clique: (posição global, time.monotonic() do clique)
+ClickItem = Tuple[Tuple[int, int], float]
+
+
+class ClickQueue:
+    """
+    Fila limitada de cliques (posição, time.monotonic() do clique) para o
+    worker. Cheia, o clique novo substitui o último pendente: a captura que
+    ainda vai acontecer já mostra a tela depois dos dois cliques.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = max(1, maxsize)
+        self.coalesced = 0
+        self._items: "deque[ClickItem]" = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def put(self, item: ClickItem) -> bool:
+        """Enfileira; retorna False se o clique foi fundido ao último pendente."""
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items[-1] = item
+                self.coalesced += 1
+                return False
+            self._items.append(item)
+            self._cond.notify()
+            return True
+
+    def get(self, timeout: Optional[float] = None) -> Optional[ClickItem]:
+        """
+        Próximo clique; None quando fechada e vazia. Levanta queue.Empty se
+        nada chegar em `timeout` segundos.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items or self._closed, timeout=timeout):
+                raise queue.Empty
+            return self._items.popleft() if self._items else None
+
+    def close(self) -> None:
+        """O worker termina os cliques pendentes e recebe None."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class ImageEncodePool:
+    """
+    Codifica e grava imagens num pool de processos. `workers=0` codifica na
+    thread que chamou submit() (sem processos extras). Com `max_width`, imagens
+    mais largas são reduzidas antes de codificar.
+    """
+
+    def __init__(self,
+                 image_format: str = "png",
+                 png_quality: Union[str, int] = "medium",
+                 quality: int = 90,
+                 workers: Optional[int] = None,
+                 max_width: Optional[int] = None):
+        self.pil_format, self.extension, self.params = save_options(image_format, png_quality, quality)
+        self.max_width = max_width
+        if workers is None:
+            workers = min(4, os.cpu_count() or 1)
+        self.workers = workers
+        self._pool = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+        # Um bloco por processo + um sendo preenchido pela captura
+        self.buffers = FrameBufferPool(max_slots=workers + 1) if workers > 0 else None
+        if self._pool is not None:
+            # Sobe os processos agora, não no primeiro clique
+            self._pool.submit(_warm_up)
+
+    def submit(self, img: Union[Image.Image, Frame], path: str,
+               on_done: Optional[Callable[["Future[Saved]"], None]] = None,
+               pointer: Optional[Dict[str, object]] = None,
+               sidecar: Optional[Dict[str, object]] = None) -> "Future[Saved]":
+        """
+        Agenda a gravação de `img` (Image ou Frame cru do mss) em `path` (já com
+        a extensão do formato), com o destaque `pointer` opcional. Com `sidecar`
+        (dict, pode ser vazio), o destaque não é desenhado: vai para o
+        .annot.json junto com o conteúdo de `sidecar`.
+        O Future resulta em (path, bytes gravados, {width, height, sha1, encode_ms}).
+        """
+        if self._pool is None:
+            future: "Future[Saved]" = Future()
+            try:
+                started = time.perf_counter()
+                if isinstance(img, Frame):
+                    img = img.to_image()
+                elif pointer and sidecar is None:
+                    img = img.copy()  # não riscar a imagem de quem chamou
+                future.set_result(_finish(img, path, self.pil_format, self.params,
+                                          pointer, self.max_width, sidecar, started))
+            except Exception as e:
+                future.set_exception(e)
+        elif isinstance(img, Frame):
+            future = self._submit_frame(img, path, pointer, sidecar)
+        else:
+            future = self._pool.submit(_encode_job, img.mode, img.size, img.tobytes(), path,
+                                       self.pil_format, self.params, pointer, self.max_width, sidecar)
+        if on_done is not None:
+            future.add_done_callback(on_done)
+        return future
+
+    def _submit_frame(self, frame: Frame, path: str, pointer: Optional[Dict[str, object]],
+                      sidecar: Optional[Dict[str, object]]) -> "Future[Saved]":
+        nbytes = frame.nbytes
+        shm = self.buffers.acquire(nbytes)
+        if shm is None:
+            # Todos os blocos em uso: o frame segue serializado para o processo
+            return self._pool.submit(_encode_frame_job, None, frame.data, frame.size, path,
+                                     self.pil_format, self.params, pointer, self.max_width, sidecar)
+        shm.buf[:nbytes] = frame.data
+        future = self._pool.submit(_encode_frame_job, shm.name, None, frame.size, path,
+                                   self.pil_format, self.params, pointer, self.max_width, sidecar)
+        future.add_done_callback(lambda _: self.buffers.release(shm))
+        return future
+
+    def close(self) -> None:
+        """Espera as gravações pendentes e encerra o pool."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self.buffers.close()
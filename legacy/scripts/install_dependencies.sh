@@ -33,6 +33,7 @@ Variáveis opcionais:
   SCREENSHOT_OUTPUT_DIR=./prints
   SCREENSHOT_DEBOUNCE_MS=200
   SCREENSHOT_DRAW_POINTER=1
+  SCREENSHOT_FORMAT=png|webp-lossless|webp|jpeg
 
 Exemplos:
   SCREENSHOT_MODE=cursor python3 screenshot_cross_platform.py
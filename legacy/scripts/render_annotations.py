@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Desenha o destaque do clique nas capturas gravadas com
+SCREENSHOT_POINTER_MODE=sidecar (imagem limpa + <nome>.annot.json).
+
+O original não é alterado: a versão anotada (ou a miniatura) vai para uma
+pasta de cache e é reaproveitada enquanto imagem, anotações e estilo não
+mudarem.
+
+Exemplos:
+  python render_annotations.py prints/*.png
+  python render_annotations.py prints/*.png --thumb 320 --format jpeg
+  python render_annotations.py prints/tela.png --color "#00a0ff" --radius 24
+"""
+
+import argparse
+import os
+import sys
+
+from image_pipeline import FORMATS, AnnotationRenderer, read_annotations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('images', nargs='+', help='capturas (.png/.jpg/.webp) com .annot.json ao lado')
+    parser.add_argument('--out', help='pasta de saída/cache (padrão: <pasta da imagem>/.annotated)')
+    parser.add_argument('--thumb', type=int, metavar='LARGURA', help='gera miniatura com esta largura máxima')
+    parser.add_argument('--format', default='png', choices=sorted(FORMATS), help='formato da saída (padrão png)')
+    parser.add_argument('--color', help='cor do destaque (sobrescreve a gravada)')
+    parser.add_argument('--radius', type=int, help='raio do destaque em pixels da imagem original')
+    parser.add_argument('--stroke', type=int, help='espessura do contorno')
+    args = parser.parse_args(argv)
+
+    style = {name: value for name, value in
+             (('color', args.color), ('radius', args.radius), ('stroke', args.stroke)) if value is not None}
+    renderers = {}
+    failed = 0
+    for image in args.images:
+        if image.endswith('.json'):
+            continue  # glob pegou o próprio sidecar
+        if read_annotations(image) is None:
+            print(f"[aviso] {image}: sem .annot.json, ignorada")
+            continue
+        cache_dir = args.out or os.path.join(os.path.dirname(os.path.abspath(image)), '.annotated')
+        renderer = renderers.get(cache_dir)
+        if renderer is None:
+            renderer = renderers[cache_dir] = AnnotationRenderer(cache_dir, args.format)
+        try:
+            print(renderer.render(image, max_width=args.thumb, style=style or None))
+        except OSError as e:
+            failed += 1
+            print(f"[erro] {image}: {e}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,11 +4,27 @@ Cross-platform screenshot capture (Linux/macOS/Windows) without pywin32.
 
 Features:
 - Global mouse listener via pynput (captures on left button press)
-- Captures monitor image using mss
-- Modes: primary monitor, monitor under cursor, or all monitors
-- Debounce to prevent duplicate captures
-- Optional pointer highlight at click location
-- PNG output with sanitized filename and timestamp
+- Captures monitor image using mss, in a dedicated worker thread that keeps
+  one mss instance open; the listener callback only queues the click
+- Modes: primary monitor, monitor under cursor, or all monitors (grabbed
+  in parallel, one mss instance per grab thread, with an optional stitched
+  and downscaled overview of the whole virtual screen), or "focus": only a
+  region around the click, clamped to the monitor under the cursor
+- Capture profiles capping the saved image width (resampled in the encoder)
+- Debounce to prevent duplicate captures, or a burst mode (10+ captures/s)
+  where clicks beyond the queue limit are coalesced instead of dropped
+- Optional duplicate suppression: a capture that looks like the previous one
+  of the same monitor becomes a small .ref.json instead of a new image
+- Optional watcher mode: samples the screen under a CPU budget and captures
+  on its own when it changes (keyboard flows, async page updates)
+- Optional "instant replay" mode: keeps the last seconds of downscaled
+  frames in memory and saves the frame from just before the click
+- Optional pointer highlight at click location, drawn into the image or kept
+  as vector sidecar metadata (.annot.json) for render_annotations.py
+- Per-session SQLite index of every capture (capture_index.py)
+- PNG/JPEG/WebP output with sanitized filename, microsecond timestamp and
+  per-session sequence number (no overwrites), encoded and
+  written atomically by a process pool (image_pipeline.py)
 
 Dependencies: mss, pillow, pynput
 """
@@ -16,10 +32,14 @@ import os
 import re
 import sys
 import time
+import queue
 import platform
-from datetime import datetime
+import threading
+from collections import deque
+from concurrent.futures import Future
+from functools import partial
 
-from typing import Optional, Tuple, Dict, List
+from typing import Optional, Tuple, Dict, List, Union
 
 try:
     import mss
@@ -29,7 +49,7 @@ except Exception as e:
     sys.exit(1)
 
 try:
-    from PIL import Image, ImageDraw
+    from PIL import Image
 except Exception as e:
     print(f"[erro] pillow (PIL) não instalado: {e}")
     sys.exit(1)
@@ -41,6 +61,10 @@ except Exception as e:
     print(f"[erro] pynput não instalado: {e}")
     sys.exit(1)
 
+from capture_index import CaptureIndex
+from image_pipeline import (CaptureNamer, ClickQueue, DuplicateFilter, Frame, ImageEncodePool,
+                            OverviewCanvas, focus_region, profile_width, write_reference)
+
 # =====================
 # Configurações
 # =====================
@@ -48,7 +72,22 @@ OUTPUT_DIR = os.environ.get("SCREENSHOT_OUTPUT_DIR", os.path.join(os.getcwd(), "
 # \n primary: captura monitor primário
 # \n cursor: captura monitor onde o cursor está no momento do clique
 # \n all: captura todos os monitores (um arquivo por monitor)
-CAPTURE_MODE = os.environ.get("SCREENSHOT_MODE", "cursor")  # "primary" | "cursor" | "all"
+# \n focus: só uma região em volta do clique, no monitor sob o cursor
+CAPTURE_MODE = os.environ.get("SCREENSHOT_MODE", "cursor")  # "primary" | "cursor" | "all" | "focus"
+
+# Tamanho da região do modo "focus" (limitada ao monitor)
+FOCUS_WIDTH = int(os.environ.get("SCREENSHOT_FOCUS_WIDTH", "1280"))
+FOCUS_HEIGHT = int(os.environ.get("SCREENSHOT_FOCUS_HEIGHT", "720"))
+
+# Perfil de resolução: "full" | "fhd" (1920) | "hd" (1280) | "compact" (960) de
+# largura máxima; SCREENSHOT_MAX_WIDTH, se definido, tem precedência
+PROFILE = os.environ.get("SCREENSHOT_PROFILE", "full")
+MAX_WIDTH = int(os.environ.get("SCREENSHOT_MAX_WIDTH", "0")) or None
+
+# Modo "all": também salvar uma visão geral (todos os monitores numa imagem
+# reduzida, na geometria da área virtual) com esta largura máxima
+OVERVIEW = os.environ.get("SCREENSHOT_OVERVIEW", "0") in ("1", "true", "True")
+OVERVIEW_MAX_WIDTH = int(os.environ.get("SCREENSHOT_OVERVIEW_MAX_WIDTH", "1920"))
 
 # Debounce em milissegundos (tempo mínimo entre capturas)
 DEBOUNCE_MS = int(os.environ.get("SCREENSHOT_DEBOUNCE_MS", "200"))
@@ -58,10 +97,60 @@ DRAW_POINTER = os.environ.get("SCREENSHOT_DRAW_POINTER", "1") in ("1", "true", "
 POINTER_RADIUS = int(os.environ.get("SCREENSHOT_POINTER_RADIUS", "16"))  # raio do círculo
 POINTER_COLOR = os.environ.get("SCREENSHOT_POINTER_COLOR", "#ff3b30")    # vermelho iOS-like
 POINTER_STROKE = int(os.environ.get("SCREENSHOT_POINTER_STROKE", "3"))    # espessura do contorno
+# "burn": destaque desenhado na imagem | "sidecar": imagem limpa + <nome>.annot.json
+# (clique, raio, cor e geometria do monitor), desenhado depois por render_annotations.py
+POINTER_MODE = os.environ.get("SCREENSHOT_POINTER_MODE", "burn")
 
 # Prefixo de nome de arquivo (opcional)
 FILENAME_PREFIX = os.environ.get("SCREENSHOT_FILENAME_PREFIX", "screen")
 
+# Formato de saída: "png" | "jpeg" | "webp" | "webp-lossless" (ver image_pipeline.py)
+IMAGE_FORMAT = os.environ.get("SCREENSHOT_FORMAT", "png")
+# PNG: "high" (menor arquivo) | "medium" | "low" (mais rápido) | 0-9
+PNG_QUALITY = os.environ.get("SCREENSHOT_PNG_QUALITY", "medium")
+# Qualidade de JPEG/WebP com perdas
+IMAGE_QUALITY = int(os.environ.get("SCREENSHOT_QUALITY", "90"))
+# Processos de codificação (0 = codifica na thread de captura)
+ENCODE_WORKERS = int(os.environ["SCREENSHOT_ENCODE_WORKERS"]) if os.environ.get("SCREENSHOT_ENCODE_WORKERS") else None
+
+# Cliques aguardando o worker de captura; com a fila cheia o clique novo é
+# fundido ao último pendente (uma captura só, com a posição mais recente)
+CAPTURE_QUEUE_SIZE = int(os.environ.get("SCREENSHOT_QUEUE_SIZE", "8"))
+
+# Modo rajada: sem debounce, para sequências rápidas de cliques (10+ capturas/s)
+BURST = os.environ.get("SCREENSHOT_BURST", "0") in ("1", "true", "True")
+BURST_QUEUE_SIZE = int(os.environ.get("SCREENSHOT_BURST_QUEUE_SIZE", "64"))
+
+# Com o worker ocioso por este tempo (s), o mss é reaberto para pegar mudanças
+# de monitores/resolução sem custo no caminho do clique
+MONITOR_REFRESH_S = float(os.environ.get("SCREENSHOT_MONITOR_REFRESH_S", "5"))
+
+# Índice SQLite por sessão das capturas (<pasta de saída>/captures.sqlite3)
+INDEX = os.environ.get("SCREENSHOT_INDEX", "1") in ("1", "true", "True")
+
+# Supressão de capturas sem mudança visual (ver DuplicateFilter em image_pipeline.py)
+DEDUP = os.environ.get("SCREENSHOT_DEDUP", "0") in ("1", "true", "True")
+DEDUP_TOLERANCE = int(os.environ.get("SCREENSHOT_DEDUP_TOLERANCE", "4"))    # variação de luminância por bloco
+DEDUP_MAX_BLOCKS = int(os.environ.get("SCREENSHOT_DEDUP_MAX_BLOCKS", "0"))  # blocos (de 32x32) que podem mudar
+
+# Modo replay: amostra a tela continuamente e, no clique, salva o frame de
+# logo antes dele (estado anterior à reação da página, sem latência de grab)
+REPLAY = os.environ.get("SCREENSHOT_REPLAY", "0") in ("1", "true", "True")
+REPLAY_FPS = float(os.environ.get("SCREENSHOT_REPLAY_FPS", "4"))          # amostras por segundo
+REPLAY_SECONDS = float(os.environ.get("SCREENSHOT_REPLAY_SECONDS", "2"))  # histórico mantido
+REPLAY_REDUCE = int(os.environ.get("SCREENSHOT_REPLAY_REDUCE", "2"))      # divisor de resolução
+# Também capturar o estado logo após o clique (grab normal, em resolução cheia)
+REPLAY_AFTER = os.environ.get("SCREENSHOT_REPLAY_AFTER", "0") in ("1", "true", "True")
+
+# Modo observador: captura sozinho quando a tela muda (sem clique), com
+# amostragem limitada a uma fração da CPU e debounce próprio
+WATCH = os.environ.get("SCREENSHOT_WATCH", "0") in ("1", "true", "True")
+WATCH_FPS = float(os.environ.get("SCREENSHOT_WATCH_FPS", "2"))              # amostras/s no máximo
+WATCH_CPU = float(os.environ.get("SCREENSHOT_WATCH_CPU", "0.05"))           # fração de um núcleo
+WATCH_TOLERANCE = int(os.environ.get("SCREENSHOT_WATCH_TOLERANCE", "12"))   # variação de luminância por bloco
+WATCH_BLOCKS = int(os.environ.get("SCREENSHOT_WATCH_BLOCKS", "8"))          # blocos (de 32x32) mudados para disparar
+WATCH_DEBOUNCE_MS = int(os.environ.get("SCREENSHOT_WATCH_DEBOUNCE_MS", "2000"))
+
 # =====================
 # Utilitários
 # =====================
@@ -70,8 +159,9 @@ def ensure_dir(path: str) -> None:
     os.makedirs(path, exist_ok=True)
 
 
-def timestamp() -> str:
-    return datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+def wall_time(mono: float) -> float:
+    """Converte um instante de time.monotonic() para time.time()."""
+    return time.time() - (time.monotonic() - mono)
 
 
 def sanitize(s: str) -> str:
@@ -80,6 +170,134 @@ def sanitize(s: str) -> str:
     return s[:100] if len(s) > 100 else s
 
 
+# =====================
+# Grab paralelo (modo "all")
+# =====================
+class GrabberPool:
+    """
+    Threads de grab, cada uma com a sua instância do mss (criada e fechada na
+    própria thread). No modo "all" os monitores são capturados em paralelo.
+    """
+
+    def __init__(self, threads: int):
+        self.threads = threads
+        self._jobs: "queue.Queue" = queue.Queue()
+        self._workers = [threading.Thread(target=self._run, name=f"grab-{i}", daemon=True)
+                         for i in range(threads)]
+        for worker in self._workers:
+            worker.start()
+
+    def _run(self) -> None:
+        sct = mss.mss()
+        try:
+            while True:
+                job = self._jobs.get()
+                if job is None:
+                    return
+                fn, future = job
+                try:
+                    future.set_result(fn(sct))
+                except BaseException as e:
+                    future.set_exception(e)
+        finally:
+            sct.close()
+
+    def submit(self, fn) -> Future:
+        """Executa `fn(sct)` numa das threads de grab."""
+        future: Future = Future()
+        self._jobs.put((fn, future))
+        return future
+
+    def close(self) -> None:
+        for _ in self._workers:
+            self._jobs.put(None)
+        for worker in self._workers:
+            worker.join()
+
+
+# =====================
+# Replay (frames anteriores ao clique)
+# =====================
+def _monitor_key(mon: Monitor) -> Tuple[int, int, int, int]:
+    return mon["left"], mon["top"], mon["width"], mon["height"]
+
+
+class ReplayBuffer:
+    """
+    Histórico circular de frames reduzidos por monitor: (instante monotônico,
+    imagem RGB reduzida por `reduce`). Limitado a `seconds * fps` frames por
+    monitor; o mais antigo sai quando chega um novo.
+    """
+
+    def __init__(self, seconds: float = REPLAY_SECONDS, fps: float = REPLAY_FPS, reduce: int = REPLAY_REDUCE):
+        self.reduce = max(1, reduce)
+        self.maxlen = max(1, int(seconds * fps))
+        self._frames: Dict[Tuple[int, int, int, int], deque] = {}
+
+    def add(self, mon: Monitor, taken_at: float, frame: Frame) -> None:
+        img = frame.to_image()
+        if self.reduce > 1:
+            img = img.reduce(self.reduce)
+        frames = self._frames.get(_monitor_key(mon))
+        if frames is None:
+            frames = self._frames[_monitor_key(mon)] = deque(maxlen=self.maxlen)
+        frames.append((taken_at, img))
+
+    def before(self, mon: Monitor, instant: float) -> Optional[Tuple[float, Image.Image]]:
+        """Frame mais recente do monitor tirado até `instant` (ou None)."""
+        for taken_at, img in reversed(self._frames.get(_monitor_key(mon), ())):
+            if taken_at <= instant:
+                return taken_at, img
+        return None
+
+
+# =====================
+# Observador (capturas por mudança visual)
+# =====================
+class ChangeWatcher:
+    """
+    Decide quando a tela mudou o bastante, em relação à última captura de cada
+    monitor, para uma captura automática. O intervalo entre amostras cresce
+    com o custo medido (grab + hash) para caber em `cpu_budget`.
+    """
+
+    def __init__(self, fps: float = WATCH_FPS, cpu_budget: float = WATCH_CPU,
+                 tolerance: int = WATCH_TOLERANCE, blocks: int = WATCH_BLOCKS,
+                 debounce_ms: int = WATCH_DEBOUNCE_MS):
+        self.min_interval = 1 / fps
+        self.cpu_budget = cpu_budget
+        self.debounce_s = debounce_ms / 1000
+        self.next_at = time.monotonic()
+        self._filter = DuplicateFilter(tolerance=tolerance, max_changed=blocks)
+        self._last_emit: Dict[Tuple[int, int, int, int], float] = {}
+
+    def changed(self, mon: Monitor, frame: Frame) -> Optional[bytes]:
+        """Hash do frame se ele deve virar captura; None se não mudou ou em debounce."""
+        key = _monitor_key(mon)
+        digest, same = self._filter.lookup(key, frame)
+        if key not in self._filter:
+            # Primeira amostra (ou depois de um clique): só a referência
+            self._filter.remember(key, digest, "", time.monotonic())
+            return None
+        if same is not None or time.monotonic() - self._last_emit.get(key, 0.0) < self.debounce_s:
+            return None
+        return digest
+
+    def emitted(self, mon: Monitor, digest: bytes, path: str) -> None:
+        key = _monitor_key(mon)
+        now = time.monotonic()
+        self._filter.remember(key, digest, path, now)
+        self._last_emit[key] = now
+
+    def rebase(self) -> None:
+        """Após uma captura por clique, a próxima amostra vira a nova referência."""
+        self._filter.clear()
+
+    def schedule(self, started_at: float) -> None:
+        cost = time.monotonic() - started_at
+        self.next_at = time.monotonic() + max(self.min_interval, cost / self.cpu_budget)
+
+
 # =====================
 # Núcleo de captura
 # =====================
@@ -91,18 +309,47 @@ class CrossPlatformScreenshot:
                  draw_pointer: bool = DRAW_POINTER):
         self.output_dir = output_dir
         self.capture_mode = capture_mode.lower()
-        self.debounce_ms = debounce_ms
+        self.debounce_ms = 0 if BURST else debounce_ms
         self.draw_pointer = draw_pointer
+        self.pointer_mode = POINTER_MODE.lower()
+        if self.pointer_mode not in ("burn", "sidecar"):
+            print(f"[aviso] SCREENSHOT_POINTER_MODE inválido: {POINTER_MODE}. Usando 'burn'.")
+            self.pointer_mode = "burn"
         self._last_capture_ts = 0.0
-        self._mouse = MouseController()
+        # mss e lista de monitores pertencem à thread do worker (criados nela)
+        self._sct: Optional["mss.base.MSSBase"] = None
+        self._monitors: List[Monitor] = []
+        self._queue = ClickQueue(BURST_QUEUE_SIZE if BURST else CAPTURE_QUEUE_SIZE)
+        self._namer = CaptureNamer()
+        self._replay = ReplayBuffer() if REPLAY else None
+        self._dedup = DuplicateFilter(tolerance=DEDUP_TOLERANCE, max_changed=DEDUP_MAX_BLOCKS) if DEDUP else None
+        self._watcher = ChangeWatcher() if WATCH else None
+        self._mouse = MouseController() if REPLAY or WATCH else None
+        self._opened_at = 0.0
+        self._grabbers: Optional[GrabberPool] = None
+        self._worker = threading.Thread(target=self._run_worker, name="capture-worker", daemon=True)
+        self._encoder = ImageEncodePool(IMAGE_FORMAT, PNG_QUALITY, IMAGE_QUALITY, ENCODE_WORKERS,
+                                        max_width=profile_width(PROFILE, MAX_WIDTH))
+        self._buffers_reserved = False
         ensure_dir(self.output_dir)
+        self._index = CaptureIndex(self.output_dir, "screenshot_cross_platform") if INDEX else None
 
-    def _get_monitors(self, sct: mss.MSS) -> List[Monitor]:
+    def _open_grabber(self) -> None:
+        if self._sct is not None:
+            self._sct.close()
+        self._sct = mss.mss()
+        self._opened_at = time.monotonic()
         # mss.monitors[0] = bounding box virtual geral; [1:] = monitores reais
-        return sct.monitors
+        self._monitors = list(self._sct.monitors)
+        if self._encoder.buffers is not None and not self._buffers_reserved:
+            # Bloco compartilhado do tamanho do maior monitor, antes do primeiro clique
+            largest = max((m["width"] * m["height"] * 4 for m in self._monitors[1:]), default=0)
+            if largest:
+                self._encoder.buffers.reserve(largest)
+            self._buffers_reserved = True
 
-    def _monitor_under_cursor(self, monitors: List[Monitor]) -> Optional[Monitor]:
-        x, y = self._mouse.position
+    def _monitor_under_cursor(self, monitors: List[Monitor], pos: Tuple[int, int]) -> Optional[Monitor]:
+        x, y = pos
         for i, mon in enumerate(monitors[1:], start=1):
             left = mon["left"]; top = mon["top"]
             width = mon["width"]; height = mon["height"]
@@ -111,82 +358,285 @@ class CrossPlatformScreenshot:
         # fallback: primário
         return monitors[1] if len(monitors) > 1 else None
 
-    def _draw_pointer(self, img: Image.Image, mon: Monitor, click_pos: Tuple[int, int]) -> None:
+    def _pointer_for(self, mon: Monitor, click_pos: Tuple[int, int]) -> Optional[Dict[str, object]]:
+        """Destaque do clique em coordenadas do monitor (desenhado por quem codifica)."""
         if not self.draw_pointer:
-            return
+            return None
         x_global, y_global = click_pos
         # Converte posição global para coordenadas relativas ao monitor
-        x = x_global - mon["left"]
-        y = y_global - mon["top"]
-        if x < 0 or y < 0 or x >= img.width or y >= img.height:
-            return
-        draw = ImageDraw.Draw(img)
-        r = POINTER_RADIUS
-        bbox = [(x - r, y - r), (x + r, y + r)]
-        draw.ellipse(bbox, outline=POINTER_COLOR, width=POINTER_STROKE)
+        return {"x": x_global - mon["left"], "y": y_global - mon["top"], "radius": POINTER_RADIUS,
+                "color": POINTER_COLOR, "stroke": POINTER_STROKE}
 
-    def _save_png(self, pil_img: Image.Image, base_name: str) -> str:
-        fname = f"{sanitize(base_name)}_{timestamp()}.png"
+    def _save_png(self, img: Union[Image.Image, Frame], base_name: str,
+                  pointer: Optional[Dict[str, object]] = None, dedup_key: object = None,
+                  taken_at: Optional[float] = None, monitor: Optional[Dict[str, int]] = None,
+                  entry: Optional[Dict[str, object]] = None) -> str:
+        """
+        Agenda a gravação no pool de codificação e retorna o caminho final.
+        `taken_at` (time.time()) vai no nome do arquivo; padrão agora.
+        Com SCREENSHOT_POINTER_MODE=sidecar, o destaque e a geometria de
+        `monitor` vão para o .annot.json em vez dos pixels.
+        Com SCREENSHOT_DEDUP e `dedup_key`, um frame igual ao anterior da mesma
+        chave vira só um .ref.json (retornado no lugar da imagem).
+        `entry` completa a linha do índice (kind, click, clicked_at, grab_ms).
+        """
+        taken_at = taken_at if taken_at is not None else time.time()
+        fname = self._namer.name(sanitize(base_name), self._encoder.extension, taken_at)
         path = os.path.join(self.output_dir, fname)
-        pil_img.save(path, format="PNG")
+        record = {"path": path, "ts": taken_at, "kind": "click", "monitor": monitor, **(entry or {})}
+        # Destaque desenhado nos pixels: a imagem anterior marca outro clique,
+        # então uma referência para ela não representaria esta captura
+        burned = pointer is not None and self.pointer_mode == "burn"
+        remember = None
+        if self._dedup is not None and dedup_key is not None and not burned:
+            digest, ref_path = self._dedup.lookup(dedup_key, img)
+            if ref_path is not None:
+                # Coordenadas globais, como no índice
+                click = record.get("click")
+                info = {"click": [int(click[0]), int(click[1])]} if click is not None else {}
+                ref_file = write_reference(path, ref_path, info)
+                print(f"[=] Sem mudança visual: {os.path.basename(ref_file)} -> {os.path.basename(ref_path)}")
+                self._record(dict(record, path=ref_file, kind="ref", ref=ref_path))
+                return ref_file
+            remember = partial(self._dedup.remember, dedup_key, digest, path, taken_at)
+        sidecar = None
+        if self.pointer_mode == "sidecar":
+            sidecar = {"captured_at": taken_at}
+            if monitor is not None:
+                sidecar["monitor"] = {k: monitor[k] for k in ("left", "top", "width", "height")}
+        self._encoder.submit(img, path, on_done=partial(self._on_saved, record, remember),
+                             pointer=pointer, sidecar=sidecar)
         return path
 
-    def _grab_monitor(self, sct: mss.MSS, mon: Monitor) -> Image.Image:
-        shot = sct.grab(mon)
-        img = Image.frombytes("RGB", shot.size, shot.rgb)
-        return img
+    def _on_saved(self, record: Dict[str, object], remember, future) -> None:
+        try:
+            path, size, info = future.result()
+        except Exception as e:
+            print(f"[erro] Falha ao gravar screenshot: {e}")
+            return
+        # Só uma imagem gravada vira referência de duplicatas
+        if remember is not None:
+            remember()
+        print(f"[ok] Screenshot salvo: {path} ({size // 1024} KB)")
+        clicked_at = record.pop("clicked_at", None)
+        if clicked_at is not None:
+            record["total_ms"] = (time.monotonic() - clicked_at) * 1000
+        self._record(dict(record, bytes=size, **info))
+
+    def _record(self, record: Dict[str, object]) -> None:
+        if self._index is not None:
+            record.pop("clicked_at", None)
+            self._index.record(record)
+
+    def _grab_monitor(self, mon: Monitor, sct: Optional["mss.base.MSSBase"] = None) -> Frame:
+        # Buffer BGRA cru, sem o `.rgb` do mss (conversão feita no encoder)
+        shot = (sct or self._sct).grab(mon)
+        return Frame(shot.raw, shot.size)
+
+    def _capture_monitor(self, sct: "mss.base.MSSBase", mon: Monitor, base_name: str,
+                         pointer: Optional[Dict[str, object]], entry: Dict[str, object],
+                         overview: Optional[OverviewCanvas]) -> str:
+        """Grab + envio ao encoder de um monitor; o frame cru é liberado ao retornar."""
+        started = time.perf_counter()
+        frame = self._grab_monitor(mon, sct)
+        entry = dict(entry, grab_ms=(time.perf_counter() - started) * 1000)
+        if overview is not None:
+            overview.paste(mon["left"], mon["top"], frame, pointer)
+        return self._save_png(frame, base_name, pointer, dedup_key=_monitor_key(mon), monitor=mon, entry=entry)
+
+    def _grab_pool(self, threads: int) -> GrabberPool:
+        if self._grabbers is None or self._grabbers.threads < threads:
+            self._close_grab_pool()
+            self._grabbers = GrabberPool(threads)
+        return self._grabbers
+
+    def _close_grab_pool(self) -> None:
+        if self._grabbers is not None:
+            self._grabbers.close()
+            self._grabbers = None
+
+    def _targets(self, monitors: List[Monitor], pos: Tuple[int, int],
+                 warn: bool = True) -> List[Tuple[Monitor, str]]:
+        """Monitores a capturar no modo atual, com o nome base de cada arquivo."""
+        mode = self.capture_mode
+        if mode == "primary":
+            return [(monitors[1], f"{FILENAME_PREFIX}_monitor1")]
+        if mode == "all":
+            return [(mon, f"{FILENAME_PREFIX}_monitor{idx}") for idx, mon in enumerate(monitors[1:], start=1)]
+        if mode == "focus":
+            # Monitor inteiro; capture() recorta a região em volta do clique
+            return [(self._monitor_under_cursor(monitors, pos) or monitors[1], f"{FILENAME_PREFIX}_focus")]
+        if mode != "cursor" and warn:
+            print(f"[aviso] CAPTURE_MODE inválido: {mode}. Usando 'cursor'.")
+        mon = self._monitor_under_cursor(monitors, pos)
+        if mon is None:
+            if warn:
+                print("[aviso] Monitor sob cursor não encontrado, usando primário.")
+            mon = monitors[1]
+        return [(mon, f"{FILENAME_PREFIX}_cursor")]
+
+    def capture(self, click_pos: Tuple[int, int], clicked_at: Optional[float] = None) -> List[str]:
+        """Captura conforme o modo; roda na thread do worker (dona do mss)."""
+        saved: List[str] = []
+        monitors = self._monitors
+        if len(monitors) <= 1:
+            print("[aviso] Nenhum monitor detectado.")
+            return []
+
+        grabs: List[Tuple[Monitor, str, Optional[Dict[str, object]], Dict[str, object]]] = []
+        entry = {"click": click_pos, "clicked_at": clicked_at}
+        for mon, base_name in self._targets(monitors, click_pos):
+            region = mon
+            if self.capture_mode == "focus":
+                region = focus_region(mon, click_pos, FOCUS_WIDTH, FOCUS_HEIGHT)
+            pointer = self._pointer_for(region, click_pos)
+            if self._replay is not None:
+                before = self._replay.before(mon, clicked_at if clicked_at is not None else time.monotonic())
+                if before is not None:
+                    sampled_at, img = before
+                    if region is not mon:
+                        img = self._crop_replay(img, mon, region)
+                    saved.append(self._save_png(img, f"{base_name}_antes", self._scale_pointer(pointer),
+                                                dedup_key=(_monitor_key(mon), "antes"),
+                                                taken_at=wall_time(sampled_at), monitor=region,
+                                                entry=dict(entry, kind="replay")))
+                    if not REPLAY_AFTER:
+                        continue
+                    base_name = f"{base_name}_depois"
+            grabs.append((region, base_name, pointer, entry))
+
+        overview = None
+        if OVERVIEW and len(grabs) > 1:
+            overview = OverviewCanvas(monitors[0], OVERVIEW_MAX_WIDTH)
+        if len(grabs) > 1:
+            # Um grab por thread (mss próprio em cada); o encoder já codifica em paralelo
+            pool = self._grab_pool(len(grabs))
+            futures = [pool.submit(lambda sct, job=job: self._capture_monitor(sct, *job, overview))
+                       for job in grabs]
+            saved.extend(future.result() for future in futures)
+        else:
+            saved.extend(self._capture_monitor(self._sct, *job, overview) for job in grabs)
+        if overview is not None:
+            # Um clique só: no máximo um destaque na visão geral
+            sidecar_mode = self.pointer_mode == "sidecar"
+            pointer = overview.pointers[0] if sidecar_mode and overview.pointers else None
+            saved.append(self._save_png(overview.finish(draw=not sidecar_mode), f"{FILENAME_PREFIX}_overview",
+                                        pointer, monitor=monitors[0], entry=dict(entry, kind="overview")))
+        return saved
+
+    def _crop_replay(self, img: Image.Image, mon: Monitor, region: Dict[str, int]) -> Image.Image:
+        # Frame do replay é do monitor inteiro e reduzido
+        r = self._replay.reduce
+        left, top = (region["left"] - mon["left"]) // r, (region["top"] - mon["top"]) // r
+        return img.crop((left, top, left + region["width"] // r, top + region["height"] // r))
+
+    def _scale_pointer(self, pointer: Optional[Dict[str, object]]) -> Optional[Dict[str, object]]:
+        # Frames do replay estão reduzidos; o raio/traço ficam no tamanho original
+        if pointer is None or self._replay.reduce == 1:
+            return pointer
+        return dict(pointer, x=pointer["x"] // self._replay.reduce, y=pointer["y"] // self._replay.reduce)
+
+    def _refresh_if_stale(self) -> None:
+        # Amostragem contínua não deixa o worker ocioso: reabrir por tempo
+        if time.monotonic() - self._opened_at > MONITOR_REFRESH_S:
+            self._open_grabber()
 
-    def capture(self, click_pos: Tuple[int, int]) -> List[str]:
+    def _sample(self) -> None:
+        """Amostra os monitores alvo para o histórico do replay."""
+        self._refresh_if_stale()
+        monitors = self._monitors
+        if len(monitors) <= 1:
+            return
+        pos = self._mouse.position
+        for mon, _ in self._targets(monitors, (int(pos[0]), int(pos[1])), warn=False):
+            taken_at = time.monotonic()
+            self._replay.add(mon, taken_at, self._grab_monitor(mon))
+
+    def _watch(self) -> None:
+        """Amostra os monitores alvo e captura os que mudaram (modo observador)."""
+        started_at = time.monotonic()
+        try:
+            self._refresh_if_stale()
+            monitors = self._monitors
+            if len(monitors) <= 1:
+                return
+            pos = self._mouse.position
+            for mon, base_name in self._targets(monitors, (int(pos[0]), int(pos[1])), warn=False):
+                frame = self._grab_monitor(mon)
+                digest = self._watcher.changed(mon, frame)
+                if digest is not None:
+                    path = self._save_png(frame, f"{base_name}_auto", monitor=mon, entry={"kind": "auto"})
+                    self._watcher.emitted(mon, digest, path)
+        finally:
+            self._watcher.schedule(started_at)
+
+    def _run_worker(self) -> None:
+        self._open_grabber()
+        next_sample = time.monotonic()
+        try:
+            while True:
+                deadlines = []
+                if self._replay is not None:
+                    deadlines.append(next_sample)
+                if self._watcher is not None:
+                    deadlines.append(self._watcher.next_at)
+                timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else MONITOR_REFRESH_S
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    if not deadlines:
+                        self._open_grabber()
+                        continue
+                    now = time.monotonic()
+                    if self._replay is not None and now >= next_sample:
+                        try:
+                            self._sample()
+                        except Exception as e:
+                            print(f"[erro] Falha ao amostrar a tela: {e}")
+                            self._open_grabber()
+                        next_sample = max(next_sample + 1 / REPLAY_FPS, time.monotonic())
+                    if self._watcher is not None and now >= self._watcher.next_at:
+                        try:
+                            self._watch()
+                        except Exception as e:
+                            print(f"[erro] Falha ao observar a tela: {e}")
+                            self._open_grabber()
+                    continue
+                if item is None:
+                    return
+                click_pos, clicked_at = item
+                if self._watcher is not None:
+                    self._watcher.rebase()
+                try:
+                    self.capture(click_pos, clicked_at)
+                except Exception as e:
+                    print(f"[erro] Falha ao capturar: {e}")
+                    # Ex: monitor desconectado; reabrir para a próxima captura
+                    self._close_grab_pool()
+                    self._open_grabber()
+        finally:
+            self._close_grab_pool()
+            self._sct.close()
+
+    def submit(self, click_pos: Tuple[int, int]) -> bool:
+        """
+        Aplica o debounce (desligado no modo rajada) e enfileira o clique para
+        o worker; não bloqueia. Retorna False se o clique foi ignorado ou
+        fundido a um pendente.
+        """
         now = time.time() * 1000
         if now - self._last_capture_ts < self.debounce_ms:
-            return []
+            return False
         self._last_capture_ts = now
-        saved: List[str] = []
-        with mss.mss() as sct:
-            monitors = self._get_monitors(sct)
-            if len(monitors) <= 1:
-                print("[aviso] Nenhum monitor detectado.")
-                return []
-
-            mode = self.capture_mode
-            if mode == "primary":
-                mon = monitors[1]
-                img = self._grab_monitor(sct, mon)
-                self._draw_pointer(img, mon, click_pos)
-                saved.append(self._save_png(img, f"{FILENAME_PREFIX}_monitor1"))
-            elif mode == "cursor":
-                mon = self._monitor_under_cursor(monitors)
-                if mon is None:
-                    print("[aviso] Monitor sob cursor não encontrado, usando primário.")
-                    mon = monitors[1]
-                img = self._grab_monitor(sct, mon)
-                self._draw_pointer(img, mon, click_pos)
-                saved.append(self._save_png(img, f"{FILENAME_PREFIX}_cursor"))
-            elif mode == "all":
-                for idx, mon in enumerate(monitors[1:], start=1):
-                    img = self._grab_monitor(sct, mon)
-                    self._draw_pointer(img, mon, click_pos)
-                    saved.append(self._save_png(img, f"{FILENAME_PREFIX}_monitor{idx}"))
-            else:
-                print(f"[aviso] CAPTURE_MODE inválido: {mode}. Usando 'cursor'.")
-                mon = self._monitor_under_cursor(monitors)
-                img = self._grab_monitor(sct, mon)
-                self._draw_pointer(img, mon, click_pos)
-                saved.append(self._save_png(img, f"{FILENAME_PREFIX}_cursor"))
-        return saved
+        return self._queue.put((click_pos, time.monotonic()))
 
     # Listener callback
     def on_click(self, x: int, y: int, button, pressed: bool):
-        try:
-            if not pressed:
-                return
-            if button != mouse.Button.left:
-                return
-            saved = self.capture((x, y))
-            for path in saved:
-                print(f"[ok] Screenshot salvo: {path}")
-        except Exception as e:
-            print(f"[erro] Falha ao capturar: {e}")
+        if not pressed:
+            return
+        if button != mouse.Button.left:
+            return
+        self.submit((x, y))
 
     def start(self):
         print("═══════════════════════════════════════════════════")
@@ -194,11 +644,32 @@ class CrossPlatformScreenshot:
         print(" Sistema:", platform.platform())
         print(" Modo:   ", self.capture_mode)
         print(" Pasta:  ", self.output_dir)
-        print(" Debounce(ms):", self.debounce_ms)
-        print(" Ponteiro:", "on" if self.draw_pointer else "off")
+        print(" Formato:", IMAGE_FORMAT, f"({self._encoder.workers} processo(s) de codificação)")
+        if self._encoder.max_width:
+            print(f" Largura máxima: {self._encoder.max_width}px (perfil {PROFILE})")
+        if self.capture_mode == "focus":
+            print(f" Foco:    região de {FOCUS_WIDTH}x{FOCUS_HEIGHT} em volta do clique")
+        if BURST:
+            print(f" Rajada:  sem debounce, fila de {self._queue.maxsize} clique(s)")
+        else:
+            print(" Debounce(ms):", self.debounce_ms)
+        if self._index is not None:
+            print(f" Índice:  {self._index.path} (sessão {self._index.session})")
+        print(" Ponteiro:", f"on ({self.pointer_mode})" if self.draw_pointer else "off")
+        if OVERVIEW and self.capture_mode == "all":
+            print(f" Visão geral: até {OVERVIEW_MAX_WIDTH}px de largura")
+        if self._watcher is not None:
+            print(f" Observador: até {WATCH_FPS:g} amostras/s, {WATCH_CPU:.0%} de CPU, "
+                  f"{WATCH_BLOCKS} bloco(s) mudados, debounce {WATCH_DEBOUNCE_MS}ms")
+        if self._dedup is not None:
+            print(f" Duplicatas: suprimidas (tolerância {DEDUP_TOLERANCE}, até {DEDUP_MAX_BLOCKS} bloco(s))")
+        if self._replay is not None:
+            print(f" Replay:  {REPLAY_FPS:g} fps, {REPLAY_SECONDS:g}s, 1/{self._replay.reduce} da resolução"
+                  + (" + captura após o clique" if REPLAY_AFTER else ""))
         print(" Clique esquerdo do mouse para capturar.")
         print(" Ctrl+C para sair.")
         print("═══════════════════════════════════════════════════")
+        self._worker.start()
         listener = mouse.Listener(on_click=self.on_click)
         listener.start()
         try:
@@ -207,6 +678,17 @@ class CrossPlatformScreenshot:
         except KeyboardInterrupt:
             print("[info] Encerrado pelo usuário.")
             listener.stop()
+            self.stop()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Termina as capturas já enfileiradas e encerra o worker."""
+        self._queue.close()
+        self._worker.join(timeout=timeout)
+        self._encoder.close()
+        if self._index is not None:
+            self._index.close()
+        if self._queue.coalesced:
+            print(f"[info] {self._queue.coalesced} clique(s) fundido(s) a capturas pendentes (fila cheia).")
 
 
 def main():
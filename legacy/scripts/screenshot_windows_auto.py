@@ -4,7 +4,8 @@ Automação de Screenshot para Navegadores no Windows
 
 Escuta global de cliques do mouse (botão esquerdo) e captura a janela ativa
 se for um navegador (Chrome, Edge, Brave, Firefox). Salva screenshots em PNG
-com nome sanitizado e timestamp.
+(ou JPEG/WebP) com nome sanitizado e timestamp; a codificação e a gravação
+rodam num pool de processos (image_pipeline.py), fora do listener do mouse.
 
 Requisitos:
   - pip install pynput mss pillow pywin32
@@ -16,19 +17,21 @@ Atalhos:
   - Ctrl+Shift+P: Pausar/Retomar captura
   - Ctrl+Shift+Q: Encerrar script
 
-Configurações (edite as constantes abaixo):
+Configurações (edite config_screenshot.py, ao lado deste script):
   - BROWSER_FILTER: Filtrar por navegador específico (None = todos)
   - TITLE_FILTER: Filtrar por parte do título da janela
-  - DEBOUNCE_MS: Intervalo mínimo entre capturas (ms)
+  - DEBOUNCE_MS / BURST: Intervalo mínimo entre capturas (ms) / modo rajada
   - OUTPUT_DIR: Diretório de saída para screenshots
+  - IMAGE_FORMAT / PNG_QUALITY / IMAGE_QUALITY / ENCODE_WORKERS / DEDUP* /
+    PROFILE / MAX_WIDTH / FOCUS* / INDEX / INCLUDE_WINDOWS_TASKBAR / ...
 """
 
+import importlib.util
 import os
 import sys
 import time
 import threading
 import re
-from datetime import datetime
 from pathlib import Path
 from typing import Optional, Tuple
 
@@ -53,36 +56,32 @@ except ImportError:
     print("❌ Erro: mss não instalado. Execute: pip install mss")
     sys.exit(1)
 
-try:
-    from PIL import Image
-except ImportError:
+# Pillow é usado por image_pipeline.py (nos processos de codificação)
+if importlib.util.find_spec("PIL") is None:
     print("❌ Erro: Pillow não instalado. Execute: pip install pillow")
     sys.exit(1)
 
+from capture_index import CaptureIndex
+from image_pipeline import (CaptureNamer, ClickQueue, DuplicateFilter, Frame, ImageEncodePool,
+                            focus_region, profile_width, write_reference)
+
 # ============================================================================
 # CONFIGURAÇÕES
 # ============================================================================
 
-# Diretório de saída
-OUTPUT_DIR = "./prints"
-
-# Filtrar por navegador específico (None = todos, "chrome", "firefox", "edge", "brave")
-BROWSER_FILTER = None
-
-# Filtrar por parte do título (None = sem filtro, ex: "H2Maps" só captura se título contém)
-TITLE_FILTER = None
-
-# Debounce em milissegundos (tempo mínimo entre capturas)
-DEBOUNCE_MS = 150
-
-# Se True, captura o monitor inteiro da janela ativa (inclui barra do Windows com data/hora)
-# Se False, captura apenas a janela ativa do navegador
-INCLUDE_WINDOWS_TASKBAR = True
+# Todas as configurações ficam em config_screenshot.py, ao lado deste script
+from config_screenshot import (BROWSER_FILTER, BURST, BURST_QUEUE_SIZE, CAPTURE_QUEUE_SIZE,
+                               CREATE_DIR_IF_NOT_EXISTS, CUSTOM_BROWSER_CLASSES, CUSTOM_BROWSER_EXECUTABLES, DEBOUNCE_MS, DEDUP,
+                               DEDUP_MAX_BLOCKS, DEDUP_TOLERANCE, ENCODE_WORKERS, FOCUS, FOCUS_HEIGHT,
+                               FOCUS_WIDTH, IMAGE_FORMAT, IMAGE_QUALITY, INCLUDE_WINDOWS_TASKBAR, INDEX,
+                               MAX_WIDTH, MIN_WINDOW_HEIGHT, MIN_WINDOW_WIDTH, OUTPUT_DIR, PNG_QUALITY,
+                               PROFILE, TITLE_FILTER, TITLE_FILTER_CASE_SENSITIVE)
 
 # Mapeamento de classes de janelas para navegadores
 BROWSER_CLASSES = {
     "Chrome_WidgetWin_1": ["chrome", "edge", "brave"],
     "MozillaWindowClass": ["firefox"],
+    **CUSTOM_BROWSER_CLASSES,
 }
 
 # Mapeamento de executáveis para tipos de navegador
@@ -91,6 +90,7 @@ BROWSER_EXECUTABLES = {
     "msedge.exe": "Edge",
     "brave.exe": "Brave",
     "firefox.exe": "Firefox",
+    **CUSTOM_BROWSER_EXECUTABLES,
 }
 
 # ============================================================================
@@ -106,10 +106,19 @@ class BrowserScreenshotCapture:
         self.running = True
         self.listener = None
         self.keyboard_listener = None
+        self.encoder = ImageEncodePool(IMAGE_FORMAT, PNG_QUALITY, IMAGE_QUALITY, ENCODE_WORKERS,
+                                       max_width=profile_width(PROFILE, MAX_WIDTH))
+        self.namer = CaptureNamer()
+        self.debounce_ms = 0 if BURST else DEBOUNCE_MS
+        # O listener só enfileira o clique; grab e gravação rodam na thread de captura
+        self.click_queue = ClickQueue(BURST_QUEUE_SIZE if BURST else CAPTURE_QUEUE_SIZE)
+        self.worker = threading.Thread(target=self._run_worker, name="capture-worker", daemon=True)
+        self.dedup = DuplicateFilter(tolerance=DEDUP_TOLERANCE, max_changed=DEDUP_MAX_BLOCKS) if DEDUP else None
         
         # Criar diretório de saída se não existir
         Path(OUTPUT_DIR).mkdir(parents=True, exist_ok=True)
         print(f"📁 Diretório de saída: {Path(OUTPUT_DIR).resolve()}")
+        self.index = CaptureIndex(OUTPUT_DIR, "screenshot_windows_auto") if INDEX else None
     
     def get_active_window(self) -> Optional[Tuple[int, str, str]]:
         """
@@ -182,6 +191,8 @@ class BrowserScreenshotCapture:
         """Verifica se deve capturar baseado no filtro de título."""
         if TITLE_FILTER is None:
             return True
+        if TITLE_FILTER_CASE_SENSITIVE:
+            return TITLE_FILTER in title
         return TITLE_FILTER.lower() in title.lower()
     
     def get_window_rect(self, hwnd: int) -> Optional[Tuple[int, int, int, int]]:
@@ -222,12 +233,19 @@ class BrowserScreenshotCapture:
             print(f"⚠️  Erro ao obter coordenadas do monitor: {e}")
             return None
     
-    def capture_window(self, hwnd: int, title: str, nav_type: str) -> bool:
+    def capture_window(self, hwnd: int, title: str, nav_type: str,
+                       click_pos: Optional[Tuple[int, int]] = None,
+                       clicked_at: Optional[float] = None) -> bool:
         """
-        Captura apenas a janela especificada e salva como PNG.
-        Retorna: True se capturado com sucesso, False caso contrário.
+        Captura a janela especificada e agenda a gravação no pool de codificação.
+        Com FOCUS e `click_pos`, só a região em volta do clique. `clicked_at`
+        (time.monotonic() do clique) é a origem do tempo total no índice.
+        Retorna: True se a captura foi feita, False caso contrário.
         """
         try:
+            started = time.monotonic()
+            clicked_at = clicked_at if clicked_at is not None else started
+            captured_at = time.time()
             # Obter coordenadas (monitor inteiro ou janela ativa)
             rect = self.get_monitor_rect(hwnd) if INCLUDE_WINDOWS_TASKBAR else self.get_window_rect(hwnd)
             if rect is None:
@@ -238,33 +256,72 @@ class BrowserScreenshotCapture:
             height = bottom - top
             
             # Validar dimensões
-            if width <= 0 or height <= 0:
-                print(f"⚠️  Dimensões inválidas da janela: {width}x{height}")
+            if width < MIN_WINDOW_WIDTH or height < MIN_WINDOW_HEIGHT:
+                print(f"⚠️  Janela pequena demais para capturar: {width}x{height} "
+                      f"(mínimo {MIN_WINDOW_WIDTH}x{MIN_WINDOW_HEIGHT})")
                 return False
             
+            monitor = {"top": top, "left": left, "width": width, "height": height}
+            if FOCUS and click_pos is not None:
+                monitor = focus_region(monitor, click_pos, FOCUS_WIDTH, FOCUS_HEIGHT)
+                rect = (monitor["left"], monitor["top"],
+                        monitor["left"] + monitor["width"], monitor["top"] + monitor["height"])
+                width, height = monitor["width"], monitor["height"]
+
             # Capturar a região da tela usando mss
             with mss.mss() as sct:
-                monitor = {"top": top, "left": left, "width": width, "height": height}
                 screenshot = sct.grab(monitor)
+            grab_ms = (time.monotonic() - started) * 1000
             
-            # Converter para PIL Image
-            image = Image.frombytes("RGB", screenshot.size, screenshot.rgb)
+            # Frame BGRA cru: a conversão para RGB acontece no processo que codifica
+            frame = Frame(screenshot.raw, screenshot.size)
             
             # Sanitizar título para nome de arquivo
             safe_title = self._sanitize_filename(title)
             
-            # Gerar nome do arquivo com timestamp
-            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-            filename = f"{safe_title}_{timestamp}.png"
+            # Nome com microssegundos + sequência da sessão (sem sobrescrever)
+            filename = self.namer.name(safe_title, self.encoder.extension)
             filepath = Path(OUTPUT_DIR) / filename
-            
-            # Salvar arquivo
-            image.save(str(filepath), "PNG")
 
             capture_mode = "Monitor inteiro (com barra do Windows)" if INCLUDE_WINDOWS_TASKBAR else "Janela ativa"
-            
-            print(f"✅ Screenshot capturado: {filename}")
-            print(f"   Navegador: {nav_type} | Tamanho: {width}x{height} | Modo: {capture_mode} | Título: {title[:50]}")
+            if FOCUS and click_pos is not None:
+                capture_mode = f"Foco {width}x{height} ({capture_mode})"
+
+            # Linha do índice da sessão (completada quando a gravação terminar)
+            record = {"path": str(filepath), "ts": captured_at, "kind": "click", "click": click_pos,
+                      "monitor": monitor, "title": title, "browser": nav_type, "grab_ms": grab_ms}
+
+            # Sem mudança visual desde a última captura desta região: só a referência
+            digest = None
+            if self.dedup is not None:
+                digest, ref_path = self.dedup.lookup(rect, frame)
+                if ref_path is not None:
+                    # Clique em coordenadas globais da tela, como no índice
+                    info = {"title": title, "browser": nav_type}
+                    if click_pos is not None:
+                        info["click"] = [int(click_pos[0]), int(click_pos[1])]
+                    ref_file = write_reference(str(filepath), ref_path, info)
+                    print(f"🟰 Sem mudança visual: {filename} -> {Path(ref_path).name}")
+                    if self.index is not None:
+                        self.index.record(dict(record, path=ref_file, kind="ref", ref=ref_path))
+                    return True
+
+            def on_saved(future):
+                try:
+                    _, size, info = future.result()
+                except Exception as e:
+                    print(f"❌ Erro ao salvar screenshot {filename}: {e}")
+                    return
+                # Só uma imagem gravada vira referência de duplicatas
+                if digest is not None:
+                    self.dedup.remember(rect, digest, str(filepath), captured_at)
+                print(f"✅ Screenshot capturado: {filename} ({size // 1024} KB)")
+                print(f"   Navegador: {nav_type} | Tamanho: {width}x{height} | Modo: {capture_mode} | Título: {title[:50]}")
+                if self.index is not None:
+                    self.index.record(dict(record, bytes=size, total_ms=(time.monotonic() - clicked_at) * 1000, **info))
+
+            # Codificar e salvar fora do listener (gravação atômica)
+            self.encoder.submit(frame, str(filepath), on_done=on_saved)
             
             return True
         
@@ -295,13 +352,30 @@ class BrowserScreenshotCapture:
         if self.paused:
             return
         
-        # Debounce: ignorar se passou pouco tempo desde última captura
+        # Debounce: ignorar se passou pouco tempo desde última captura (0 em rajada)
         current_time = time.time() * 1000  # Converter para ms
-        if current_time - self.last_capture_time < DEBOUNCE_MS:
+        if current_time - self.last_capture_time < self.debounce_ms:
             return
         
         self.last_capture_time = current_time
         
+        # Só enfileira: o hook do mouse não pode esperar grab e gravação
+        self.click_queue.put(((x, y), time.monotonic()))
+    
+    def _run_worker(self):
+        """Thread de captura: processa os cliques da fila em ordem."""
+        while True:
+            item = self.click_queue.get()
+            if item is None:
+                return
+            (x, y), clicked_at = item
+            try:
+                self.handle_click(x, y, clicked_at)
+            except Exception as e:
+                print(f"❌ Erro ao processar clique: {e}")
+    
+    def handle_click(self, x: int, y: int, clicked_at: float):
+        """Captura a janela ativa se for um navegador que passa nos filtros."""
         # Obter janela ativa
         window_info = self.get_active_window()
         if window_info is None:
@@ -319,7 +393,7 @@ class BrowserScreenshotCapture:
             return
         
         # Capturar screenshot
-        self.capture_window(hwnd, title, nav_type or "Unknown")
+        self.capture_window(hwnd, title, nav_type or "Unknown", (x, y), clicked_at)
     
     def on_keyboard_event(self, key):
         """Callback para eventos de teclado."""
@@ -347,16 +421,25 @@ class BrowserScreenshotCapture:
         """Inicia os listeners de mouse e teclado."""
         print("🎯 Listener iniciado. Aguardando cliques...")
         print(f"📋 Configurações:")
-        print(f"   - Debounce: {DEBOUNCE_MS}ms")
+        if BURST:
+            print(f"   - Rajada: sem debounce, fila de {self.click_queue.maxsize} clique(s)")
+        else:
+            print(f"   - Debounce: {self.debounce_ms}ms")
         print(f"   - Navegador: {BROWSER_FILTER or 'Todos'}")
         print(f"   - Filtro de título: {TITLE_FILTER or 'Nenhum'}")
         print(f"   - Captura barra Windows: {'Sim' if INCLUDE_WINDOWS_TASKBAR else 'Não'}")
         print(f"   - Saída: {OUTPUT_DIR}")
+        print(f"   - Formato: {IMAGE_FORMAT} ({self.encoder.workers} processo(s) de codificação)")
+        print(f"   - Largura máxima: {self.encoder.max_width or 'original'} | Foco: "
+              f"{f'{FOCUS_WIDTH}x{FOCUS_HEIGHT}' if FOCUS else 'Não'}")
+        print(f"   - Índice: {f'{self.index.path} (sessão {self.index.session})' if self.index else 'Não'}")
+        print(f"   - Suprimir duplicatas: {'Sim' if DEDUP else 'Não'}")
         print("\n⌨️  Atalhos:")
         print("   - Botão Esquerdo do Mouse: Capturar janela ativa")
         print("   - Ctrl+Shift+Q: Encerrar script\n")
         
-        # Listener de mouse
+        # Thread de captura e listener de mouse
+        self.worker.start()
         self.listener = mouse.Listener(on_click=self.on_mouse_click)
         self.listener.start()
         
@@ -376,6 +459,15 @@ class BrowserScreenshotCapture:
             self.listener.stop()
         if self.keyboard_listener:
             self.keyboard_listener.stop()
+        # Terminar os cliques pendentes e esperar as imagens ainda em codificação
+        self.click_queue.close()
+        if self.worker.is_alive():
+            self.worker.join(timeout=30)
+        self.encoder.close()
+        if self.index is not None:
+            self.index.close()
+        if self.click_queue.coalesced:
+            print(f"ℹ️  {self.click_queue.coalesced} clique(s) fundido(s) a capturas pendentes (fila cheia)")
         print("✅ Finalizado")
 
 
@@ -391,6 +483,9 @@ def main():
     print()
     
     # Validar que o diretório pode ser criado
+    if not CREATE_DIR_IF_NOT_EXISTS and not Path(OUTPUT_DIR).is_dir():
+        print(f"❌ Diretório de saída não existe: {OUTPUT_DIR} (CREATE_DIR_IF_NOT_EXISTS = False)")
+        sys.exit(1)
     try:
         Path(OUTPUT_DIR).mkdir(parents=True, exist_ok=True)
     except Exception as e:
@@ -73,7 +73,7 @@ if Path("config_screenshot.py").exists():
     print("  ✅ config_screenshot.py encontrado")
     checks["arquivo_config"] = True
 else:
-    print("  ⚠️  config_screenshot.py não encontrado (opcional)")
+    print("  ❌ config_screenshot.py NÃO encontrado (configuração de screenshot_windows_auto.py)")
 
 print()
 
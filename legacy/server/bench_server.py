@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Benchmark de carga do servidor de triggers (server.py), todo numa máquina só.
+
+Sobe o servidor como subprocesso (padrão) ou no próprio processo
+(--in-process), dispara requisições contra /trigger-add-step, /trigger-state,
+/trigger-events e /trigger-add-steps com concorrência, mix e duração
+configuráveis e imprime um relatório JSON com throughput e latências
+p50/p95/p99 por operação, para comparar execuções.
+
+Exemplos:
+  python bench_server.py
+  python bench_server.py --concurrency 32 --duration 20 --mix add=1,state=4
+  python bench_server.py --env SERVER_MODE=async --output async.json
+  python bench_server.py --url http://localhost:8010   # servidor já rodando
+
+Usa apenas a biblioteca padrão (http.client com keep-alive por conexão).
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Operação -> (método, caminho, corpo)
+OPERATIONS = {
+    'add': ('POST', '/trigger-add-step', lambda args: {'x': random.randint(0, 1920), 'y': random.randint(0, 1080)}),
+    'batch': ('POST', '/trigger-add-steps',
+              lambda args: [{'x': i, 'y': i, 'client_ts': int(time.time() * 1000)} for i in range(args.batch_size)]),
+    'state': ('GET', '/trigger-state', None),
+    'events': ('GET', '/trigger-events?since={since}', None),
+}
+
+
+def _parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"operação desconhecida no mix: {name}")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("mix sem nenhuma operação com peso > 0")
+    return mix
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_healthy(host, port, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=1)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def _start_subprocess(port, env_overrides):
+    env = dict(os.environ, PORT=str(port), **env_overrides)
+    # O log por requisição do servidor não deve entrar na medição do terminal
+    return subprocess.Popen([sys.executable, os.path.join(SERVER_DIR, 'server.py')], cwd=SERVER_DIR,
+                            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _start_in_process(port):
+    sys.path.insert(0, SERVER_DIR)
+    from werkzeug.serving import make_server
+    import server
+    httpd = make_server('127.0.0.1', port, server.app, threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def _worker_thread(args, host, port, deadline, results, lock):
+    names = list(args.mix)
+    weights = [args.mix[n] for n in names]
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    since = 0
+    conn = http.client.HTTPConnection(host, port, timeout=args.timeout)
+    while time.monotonic() < deadline:
+        name = random.choices(names, weights)[0]
+        method, path, body_factory = OPERATIONS[name]
+        body = json.dumps(body_factory(args)) if body_factory else None
+        headers = {'Content-Type': 'application/json'} if body else {}
+        start = time.perf_counter()
+        try:
+            conn.request(method, path.format(since=since), body=body, headers=headers)
+            response = conn.getresponse()
+            data = response.read()
+            elapsed = time.perf_counter() - start
+            if response.status >= 400:
+                errors[name] += 1
+                continue
+            if name == 'events':
+                since = json.loads(data).get('seq', since)
+            latencies[name].append(elapsed)
+        except (OSError, http.client.HTTPException, ValueError):
+            errors[name] += 1
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=args.timeout)
+    conn.close()
+    with lock:
+        for name in names:
+            results['latencies'][name].extend(latencies[name])
+            results['errors'][name] += errors[name]
+
+
+def _run_load(args, host, port, threads, duration):
+    """Executa `threads` clientes por `duration` segundos; roda em cada processo."""
+    results = {'latencies': {n: [] for n in args.mix}, 'errors': {n: 0 for n in args.mix}}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+    workers = [threading.Thread(target=_worker_thread, args=(args, host, port, deadline, results, lock))
+               for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return results
+
+
+def _run_load_star(params):
+    return _run_load(*params)
+
+
+def _summarize(args, results, elapsed):
+    report = {'operations': {}, 'total': {}}
+    total_ok = total_errors = 0
+    for name in args.mix:
+        values = sorted(results['latencies'][name])
+        errors = results['errors'][name]
+        total_ok += len(values)
+        total_errors += errors
+        ms = [v * 1000 for v in values]
+        report['operations'][name] = {
+            'requests': len(values),
+            'errors': errors,
+            'throughput_rps': round(len(values) / elapsed, 1),
+            'mean_ms': round(sum(ms) / len(ms), 3) if ms else None,
+            'p50_ms': _round(_percentile(ms, 50)),
+            'p95_ms': _round(_percentile(ms, 95)),
+            'p99_ms': _round(_percentile(ms, 99)),
+            'max_ms': _round(ms[-1] if ms else None),
+        }
+    report['total'] = {
+        'requests': total_ok,
+        'errors': total_errors,
+        'throughput_rps': round(total_ok / elapsed, 1),
+    }
+    return report
+
+
+def _round(value):
+    return None if value is None else round(value, 3)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', help='servidor já em execução (não inicia outro)')
+    parser.add_argument('--in-process', action='store_true',
+                        help='sobe o app Flask numa thread deste processo em vez de subprocesso')
+    parser.add_argument('--env', action='append', default=[], metavar='CHAVE=VALOR',
+                        help='variável de ambiente extra para o servidor (ex: SERVER_MODE=async)')
+    parser.add_argument('--concurrency', type=int, default=8, help='clientes simultâneos (padrão 8)')
+    parser.add_argument('--processes', type=int, default=1,
+                        help='processos geradores de carga; divide a concorrência entre eles')
+    parser.add_argument('--duration', type=float, default=10.0, help='segundos de medição (padrão 10)')
+    parser.add_argument('--warmup', type=float, default=1.0, help='segundos de aquecimento (padrão 1)')
+    parser.add_argument('--mix', type=_parse_mix, default=_parse_mix('add=1,state=4'),
+                        help='pesos por operação: add, batch, state, events (padrão add=1,state=4)')
+    parser.add_argument('--batch-size', type=int, default=10, help='eventos por requisição em "batch"')
+    parser.add_argument('--timeout', type=float, default=5.0, help='timeout por requisição (s)')
+    parser.add_argument('--seed', type=int, help='semente do gerador aleatório (reprodutibilidade)')
+    parser.add_argument('--output', help='grava o relatório JSON neste arquivo além do stdout')
+    args = parser.parse_args(argv)
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    env_overrides = dict(item.split('=', 1) for item in args.env)
+
+    server_proc = httpd = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+        target = 'external'
+    else:
+        host, port = '127.0.0.1', _free_port()
+        if args.in_process:
+            os.environ.update(env_overrides)
+            httpd = _start_in_process(port)
+            target = 'in-process'
+        else:
+            server_proc = _start_subprocess(port, env_overrides)
+            target = 'subprocess'
+
+    try:
+        if not _wait_healthy(host, port):
+            print(f"[erro] servidor não respondeu em {host}:{port}/health", file=sys.stderr)
+            return 1
+
+        processes = max(1, min(args.processes, args.concurrency))
+        per_process = [args.concurrency // processes + (1 if i < args.concurrency % processes else 0)
+                       for i in range(processes)]
+
+        if args.warmup > 0:
+            _run_load(args, host, port, min(args.concurrency, 4), args.warmup)
+
+        start = time.monotonic()
+        if processes == 1:
+            partials = [_run_load(args, host, port, args.concurrency, args.duration)]
+        else:
+            with multiprocessing.Pool(processes) as pool:
+                partials = pool.map(_run_load_star,
+                                    [(args, host, port, n, args.duration) for n in per_process])
+        elapsed = time.monotonic() - start
+
+        merged = {'latencies': {n: [] for n in args.mix}, 'errors': {n: 0 for n in args.mix}}
+        for partial in partials:
+            for name in args.mix:
+                merged['latencies'][name].extend(partial['latencies'][name])
+                merged['errors'][name] += partial['errors'][name]
+
+        report = {
+            'config': {
+                'target': target,
+                'server_env': env_overrides,
+                'concurrency': args.concurrency,
+                'processes': processes,
+                'duration_s': args.duration,
+                'mix': args.mix,
+                'batch_size': args.batch_size,
+                'python': sys.version.split()[0],
+            },
+            'elapsed_s': round(elapsed, 3),
+            **_summarize(args, merged, elapsed),
+        }
+        text = json.dumps(report, indent=2)
+        print(text)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(text + '\n')
+        return 0
+    finally:
+        if server_proc is not None:
+            server_proc.terminate()
+            server_proc.wait(timeout=10)
+        if httpd is not None:
+            httpd.shutdown()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Compara a latência clique->registrado dos transportes do hotkey_helper:
+HTTP (POST /trigger-add-step) x datagrama UDP x socket unix (trigger_ipc.py).
+
+Sobe o app Flask e os listeners IPC neste processo e mede, para cada
+trigger, a ida e volta que o helper paga: do envio até a resposta HTTP ou a
+confirmação do datagrama, enviando um trigger por vez e conferindo (via
+subscribe) que ele foi gravado. Imprime um relatório JSON com p50/p95/p99.
+
+Exemplo:
+  python bench_transport.py --count 2000
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SERVER_DIR)
+
+
+def _free_port(kind=socket.SOCK_STREAM):
+    with socket.socket(socket.AF_INET, kind) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(sorted_values, pct):
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class _Recorder:
+    """Guarda o instante em que cada trigger (identificado por x) foi gravado."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._recorded = {}
+
+    def on_append(self, events):
+        now = time.perf_counter()
+        with self._cond:
+            for event in events:
+                self._recorded[event['x']] = now
+            self._cond.notify_all()
+
+    def wait(self, marker, timeout):
+        with self._cond:
+            self._cond.wait_for(lambda: marker in self._recorded, timeout=timeout)
+            return self._recorded.pop(marker, None)
+
+
+def _bench(name, send, recorder, count, first_marker, timeout):
+    latencies = []
+    lost = 0
+    for i in range(count):
+        marker = first_marker + i
+        start = time.perf_counter()
+        try:
+            send(marker)
+        except OSError:
+            lost += 1  # sem confirmação dentro do timeout
+            continue
+        done = time.perf_counter()
+        if recorder.wait(marker, timeout) is None:
+            lost += 1
+            continue
+        latencies.append((done - start) * 1000)
+    latencies.sort()
+    if not latencies:
+        return {'transport': name, 'count': 0, 'lost': lost}
+    return {
+        'transport': name,
+        'count': len(latencies),
+        'lost': lost,
+        'mean_ms': round(sum(latencies) / len(latencies), 4),
+        'p50_ms': round(_percentile(latencies, 50), 4),
+        'p95_ms': round(_percentile(latencies, 95), 4),
+        'p99_ms': round(_percentile(latencies, 99), 4),
+        'max_ms': round(latencies[-1], 4),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=1000, help='triggers por transporte (padrão 1000)')
+    parser.add_argument('--timeout', type=float, default=2.0, help='espera máxima por trigger (s)')
+    parser.add_argument('--output', help='grava o relatório JSON neste arquivo além do stdout')
+    args = parser.parse_args(argv)
+
+    # Sem ruído de log por trigger durante a medição
+    os.environ.setdefault('TRIGGER_LOG_SAMPLE', '1000000000')
+    from werkzeug.serving import make_server
+    import logging
+    import server
+    from trigger_ipc import ACK, TriggerIpcListener, encode_trigger
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    recorder = _Recorder()
+    server._trigger_store.subscribe(recorder.on_append)
+
+    http_port = _free_port()
+    httpd = make_server('127.0.0.1', http_port, server.app, threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+
+    udp_spec = f'udp:127.0.0.1:{_free_port(socket.SOCK_DGRAM)}'
+    listeners = [TriggerIpcListener(udp_spec, server._record_ipc_trigger).start()]
+    unix_spec = None
+    if hasattr(socket, 'AF_UNIX'):
+        unix_spec = f'unix:{os.path.join(tempfile.mkdtemp(), "trigger.sock")}'
+        listeners.append(TriggerIpcListener(unix_spec, server._record_ipc_trigger).start())
+
+    conn = http.client.HTTPConnection('127.0.0.1', http_port, timeout=args.timeout)
+
+    def send_http(marker):
+        nonlocal conn
+        body = json.dumps({'x': marker, 'y': 0, 'client_ts': int(time.time() * 1000)})
+        try:
+            conn.request('POST', '/trigger-add-step', body=body, headers={'Content-Type': 'application/json'})
+            conn.getresponse().read()
+        except (OSError, http.client.HTTPException):
+            # Werkzeug responde em HTTP/1.0 e fecha a conexão: reconectar
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', http_port, timeout=args.timeout)
+            conn.request('POST', '/trigger-add-step', body=body, headers={'Content-Type': 'application/json'})
+            conn.getresponse().read()
+
+    def datagram_sender(family, address):
+        sock = socket.socket(family, socket.SOCK_DGRAM)
+        if family == socket.AF_UNIX:
+            # Como o hotkey_helper: endereço próprio para receber a confirmação
+            sock.bind(os.path.join(tempfile.mkdtemp(), 'bench.sock'))
+        sock.connect(address)
+        sock.settimeout(args.timeout)
+
+        def send(marker):
+            trace_id = os.urandom(8).hex()
+            now_ms = time.monotonic() * 1000
+            sock.send(encode_trigger(marker, 0, int(time.time() * 1000), trace_id, now_ms, now_ms))
+            # Aguarda o ack deste trigger, como o hotkey_helper
+            while ACK.unpack(sock.recv(ACK.size))[2].hex() != trace_id:
+                pass
+        return send
+
+    transports = [('http', send_http),
+                  ('udp', datagram_sender(socket.AF_INET, listeners[0].address))]
+    if unix_spec:
+        transports.append(('unix', datagram_sender(socket.AF_UNIX, listeners[1].address)))
+
+    results = []
+    try:
+        for index, (name, send) in enumerate(transports):
+            results.append(_bench(name, send, recorder, args.count, (index + 1) * 10_000_000, args.timeout))
+    finally:
+        httpd.shutdown()
+        for listener in listeners:
+            listener.close()
+
+    text = json.dumps({'count': args.count, 'python': sys.version.split()[0], 'results': results}, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
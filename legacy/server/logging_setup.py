@@ -0,0 +1,137 @@
+"""
+Configuração de logging do servidor de triggers.
+
+Modos (LOG_MODE):
+  sync  - logging.basicConfig com StreamHandler direto (comportamento original)
+  queue - o request só enfileira o LogRecord (QueueHandler, fila limitada e sem
+          bloqueio); uma thread QueueListener formata e escreve no stderr.
+          Se a fila encher, registros são descartados em vez de travar o request.
+
+Formatos (LOG_FORMAT):
+  text  - linha legível (padrão)
+  json  - um objeto JSON por linha, incluindo campos extras do registro
+          (ex: `trigger` com o evento registrado)
+
+O log por trigger passa por TriggerLogFilter, que aplica amostragem
+(1 a cada N) e limite de linhas por segundo.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Atributos padrão de LogRecord; o resto veio de `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formata cada registro como um objeto JSON numa linha."""
+
+    def format(self, record):
+        data = {
+            'ts': round(record.created, 6),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str, ensure_ascii=False)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que nunca bloqueia: com a fila cheia o registro é descartado
+    e contado em `dropped`. Não formata no thread do request (prepare() é
+    trivial), já que o listener roda no mesmo processo.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class TriggerLogFilter(logging.Filter):
+    """
+    Deixa passar 1 a cada `sample_every` registros e no máximo `max_per_second`
+    linhas por segundo (0 = sem limite). O registro seguinte que passar recebe
+    o atributo `suppressed` com quantos foram omitidos desde o último.
+    """
+
+    def __init__(self, sample_every=1, max_per_second=0.0):
+        super().__init__()
+        self.sample_every = max(1, sample_every)
+        self.max_per_second = max_per_second
+        # Balde de pelo menos 1 ficha: com limite < 1/s (ex: 0.2 = 1 a cada 5 s)
+        # o balde precisa acumular uma ficha inteira para liberar uma linha
+        self._burst = max(1.0, max_per_second)
+        self._lock = threading.Lock()
+        self._seen = 0
+        self._suppressed = 0
+        self._tokens = self._burst
+        self._last_refill = time.monotonic()
+
+    def filter(self, record):
+        with self._lock:
+            self._seen += 1
+            allowed = (self._seen - 1) % self.sample_every == 0
+            if allowed and self.max_per_second > 0:
+                now = time.monotonic()
+                self._tokens = min(self._burst,
+                                   self._tokens + (now - self._last_refill) * self.max_per_second)
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                else:
+                    allowed = False
+            if not allowed:
+                self._suppressed += 1
+                return False
+            if self._suppressed:
+                record.suppressed = self._suppressed
+                self._suppressed = 0
+            return True
+
+
+def configure_logging(mode='sync', fmt='text', level=logging.INFO, queue_size=10000):
+    """
+    Configura o logger raiz. Retorna o QueueListener no modo "queue" (já
+    iniciado e parado no atexit) ou None no modo "sync".
+    """
+    formatter = JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    if mode != 'queue':
+        root.addHandler(stream_handler)
+        return None
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    root.addHandler(DroppingQueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,143 @@
+"""
+Métricas de requisição do servidor de triggers, expostas em GET /metrics
+no formato texto do Prometheus.
+
+Tudo é mantido em estruturas de tamanho fixo (contadores por rótulo e
+histogramas com buckets pré-definidos), então registrar uma requisição custa
+um bisect e alguns incrementos sob um lock. Os valores são por processo: com
+vários workers, cada um expõe as suas próprias séries.
+
+Métricas:
+  homolog_http_requests_total{route,method,status}     - contador
+  homolog_http_request_errors_total{route,method}      - contador (status >= 400)
+  homolog_http_requests_in_flight{route}               - gauge
+  homolog_http_request_duration_seconds{route,method}  - histograma
+  homolog_trigger_delivery_delay_seconds               - histograma: tempo entre o
+      registro do trigger e a primeira vez que um cliente o recebe
+"""
+
+import threading
+import time
+from bisect import bisect_left
+
+# Buckets em segundos; vão até o timeout máximo de long-poll
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Histograma de buckets fixos (contagens não cumulativas + soma)."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # último = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _format_bucket(bound):
+    return '+Inf' if bound is None else repr(float(bound))
+
+
+class MetricsRegistry:
+    """Coleta as métricas de requisição e as renderiza para o Prometheus."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self._buckets = buckets
+        self._lock = threading.Lock()
+        self._requests = {}      # (route, method, status) -> contagem
+        self._errors = {}        # (route, method) -> contagem
+        self._in_flight = {}     # route -> requisições em andamento
+        self._durations = {}     # (route, method) -> Histogram
+        self._delivery = Histogram(buckets)
+        self._delivered_seq = 0
+
+    def request_started(self, route):
+        with self._lock:
+            self._in_flight[route] = self._in_flight.get(route, 0) + 1
+
+    def request_finished(self, route, method, status, duration):
+        key = (route, method)
+        with self._lock:
+            self._in_flight[route] = self._in_flight.get(route, 1) - 1
+            self._requests[(route, method, status)] = self._requests.get((route, method, status), 0) + 1
+            if status >= 400:
+                self._errors[key] = self._errors.get(key, 0) + 1
+            histogram = self._durations.get(key)
+            if histogram is None:
+                histogram = self._durations[key] = Histogram(self._buckets)
+            histogram.observe(duration)
+
+    def observe_delivery(self, events):
+        """
+        Registra o atraso de entrega dos eventos que ainda não tinham sido
+        entregues a nenhum cliente (seq acima da marca d'água).
+        """
+        now_ms = time.time() * 1000
+        with self._lock:
+            for event in events:
+                if event.get('seq', 0) > self._delivered_seq:
+                    self._delivered_seq = event['seq']
+                    self._delivery.observe(max(0.0, now_ms - event['ts']) / 1000)
+
+    def _render_histogram(self, lines, name, label_names, label_values, histogram):
+        cumulative = 0
+        bounds = list(histogram.buckets) + [None]
+        for bound, count in zip(bounds, histogram.counts):
+            cumulative += count
+            labels = _format_labels(label_names, label_values, ('le', _format_bucket(bound)))
+            lines.append(f'{name}_bucket{labels} {cumulative}')
+        labels = _format_labels(label_names, label_values)
+        lines.append(f'{name}_sum{labels} {histogram.sum}')
+        lines.append(f'{name}_count{labels} {histogram.count}')
+
+    def render(self):
+        """Texto no formato de exposição do Prometheus (versão 0.0.4)."""
+        lines = []
+        with self._lock:
+            lines.append('# HELP homolog_http_requests_total Requisicoes HTTP atendidas.')
+            lines.append('# TYPE homolog_http_requests_total counter')
+            for key, value in sorted(self._requests.items()):
+                lines.append(f'homolog_http_requests_total'
+                             f'{_format_labels(("route", "method", "status"), key)} {value}')
+
+            lines.append('# HELP homolog_http_request_errors_total Requisicoes HTTP com status >= 400.')
+            lines.append('# TYPE homolog_http_request_errors_total counter')
+            for key, value in sorted(self._errors.items()):
+                lines.append(f'homolog_http_request_errors_total'
+                             f'{_format_labels(("route", "method"), key)} {value}')
+
+            lines.append('# HELP homolog_http_requests_in_flight Requisicoes HTTP em andamento.')
+            lines.append('# TYPE homolog_http_requests_in_flight gauge')
+            for route, value in sorted(self._in_flight.items()):
+                lines.append(f'homolog_http_requests_in_flight{_format_labels(("route",), (route,))} {value}')
+
+            lines.append('# HELP homolog_http_request_duration_seconds Latencia das requisicoes HTTP.')
+            lines.append('# TYPE homolog_http_request_duration_seconds histogram')
+            for key, histogram in sorted(self._durations.items()):
+                self._render_histogram(lines, 'homolog_http_request_duration_seconds',
+                                       ('route', 'method'), key, histogram)
+
+            lines.append('# HELP homolog_trigger_delivery_delay_seconds Tempo entre o registro '
+                         'do trigger e a primeira entrega a um cliente.')
+            lines.append('# TYPE homolog_trigger_delivery_delay_seconds histogram')
+            self._render_histogram(lines, 'homolog_trigger_delivery_delay_seconds', (), (), self._delivery)
+        return '\n'.join(lines) + '\n'
@@ -5,23 +5,48 @@ Endpoints:
   GET  /          - Serve index.html
   GET  /health    - Verifica saúde da aplicação
   POST /trigger-add-step - Registra trigger para adicionar passo
+  POST /trigger-add-steps - Registra um lote de triggers numa única requisição
   GET  /trigger-state    - Retorna estado do último trigger
+  GET  /trigger-wait     - Long-poll: aguarda um trigger mais novo que ?after_seq=<seq> (ou ?after=<ts>)
+  GET  /trigger-events   - Retorna todos os triggers com seq > ?since=<seq>
+  GET  /metrics          - Métricas de requisição no formato do Prometheus
 """
 
 import os
+import sys
+import atexit
 import logging
-from flask import Flask, send_from_directory, request, jsonify
+import threading
+from collections import OrderedDict
+from flask import Flask, send_from_directory, request, jsonify, Response, g, abort
 from flask_cors import CORS
 import time
 
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+from logging_setup import TriggerLogFilter, configure_logging
+from metrics import MetricsRegistry
+from static_cache import StaticAssetCache
+from trigger_ipc import TriggerIpcListener
+from trigger_journal import TriggerJournal
+from trigger_store import create_trigger_store
+from trigger_trace import TriggerTracer, monotonic_ms, trace_from_payload, trace_id_from_payload
+
+# Configurar logging: LOG_MODE=sync|queue, LOG_FORMAT=text|json (ver logging_setup.py)
+configure_logging(
+    mode=os.environ.get('LOG_MODE', 'sync'),
+    fmt=os.environ.get('LOG_FORMAT', 'text'),
+    level=logging.INFO
 )
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__, static_folder='.', static_url_path='')
+# Linha de log por trigger, com amostragem (1 a cada N) e limite de linhas/s
+trigger_logger = logging.getLogger(f'{__name__}.triggers')
+trigger_logger.addFilter(TriggerLogFilter(
+    sample_every=int(os.environ.get('TRIGGER_LOG_SAMPLE', '1')),
+    max_per_second=float(os.environ.get('TRIGGER_LOG_MAX_PER_S', '0'))
+))
+
+# Sem static_folder do Flask: static_proxy (cache de estáticos) atende todos os caminhos
+app = Flask(__name__, static_folder=None)
 
 # Configurar CORS com restrições básicas (melhorar em produção)
 CORS(app, resources={
@@ -29,24 +54,162 @@ CORS(app, resources={
     r"/health": {"origins": "*"}
 })
 
-# Estado simples em memória para gatilho de criação de passo
-_trigger_state = {
-    'ts': 0,
-    'x': None,
-    'y': None
-}
+# Quantidade de eventos mantidos no log circular de triggers
+TRIGGER_LOG_SIZE = int(os.environ.get('TRIGGER_LOG_SIZE', '1024'))
+
+# Backend do estado de triggers: "memory" (processo único) ou "shm"
+# (memória compartilhada entre workers, ex: gunicorn -w 4)
+TRIGGER_STORE = os.environ.get('TRIGGER_STORE', 'memory')
+_store_options = {}
+if os.environ.get('TRIGGER_STORE_SHM_NAME'):
+    _store_options['name'] = os.environ['TRIGGER_STORE_SHM_NAME']
+
+# Log de triggers; cada evento tem um `seq` crescente
+_trigger_store = create_trigger_store(TRIGGER_STORE, TRIGGER_LOG_SIZE, **_store_options)
+
+# Journal opcional em disco (JSON lines + snapshot) para sobreviver a restarts
+TRIGGER_JOURNAL = os.environ.get('TRIGGER_JOURNAL', '')
+TRIGGER_JOURNAL_FLUSH_MS = int(os.environ.get('TRIGGER_JOURNAL_FLUSH_MS', '50'))
+_trigger_journal = None
+if TRIGGER_JOURNAL:
+    if TRIGGER_STORE != 'memory':
+        # Vários workers gravando e compactando o mesmo arquivo não é suportado
+        logger.warning("TRIGGER_JOURNAL ignorado: requer TRIGGER_STORE=memory")
+    else:
+        _trigger_journal = TriggerJournal(TRIGGER_JOURNAL, TRIGGER_LOG_SIZE,
+                                          flush_interval=TRIGGER_JOURNAL_FLUSH_MS / 1000)
+        _recovered = _trigger_journal.replay()
+        _trigger_store.restore(_recovered)
+        logger.info(f"Journal de triggers: {len(_recovered)} eventos recuperados de {TRIGGER_JOURNAL}")
+        _trigger_journal.start()
+        _trigger_store.subscribe(_trigger_journal.record)
+        atexit.register(_trigger_journal.close)
+
+# Rastreamento opcional da latência de cada trigger, do clique no helper até a
+# entrega ao painel (JSON lines; resumo com trace_report.py)
+TRIGGER_TRACE = os.environ.get('TRIGGER_TRACE', '')
+_tracer = None
+if TRIGGER_TRACE:
+    if TRIGGER_STORE != 'memory':
+        # Registro e entrega podem acontecer em workers diferentes
+        logger.warning("TRIGGER_TRACE ignorado: requer TRIGGER_STORE=memory")
+    else:
+        _tracer = TriggerTracer(TRIGGER_TRACE)
+        atexit.register(_tracer.close)
+        logger.info(f"Rastreamento de latência de triggers em {TRIGGER_TRACE}")
+
+
+def _trace_recorded(events, items):
+    """Repassa ao tracer os eventos gravados a partir de `items`."""
+    if _tracer is not None:
+        _tracer.recorded(events, [item.get('trace') for item in items])
+
+
+def _observe_delivery(events, route):
+    """Registra que `events` foram entregues a um cliente (métricas e trace)."""
+    _metrics.observe_delivery(events)
+    if _tracer is not None:
+        _tracer.delivered(events, route)
+
+
+# Triggers gravados recentemente, por trace_id: o helper reenvia por HTTP um
+# clique cujo ack IPC não chegou a tempo, e o reenvio devolve o evento já
+# gravado em vez de criar outro passo (por processo; com TRIGGER_STORE=shm o
+# reenvio pode cair em outro worker)
+TRIGGER_DEDUP_SIZE = int(os.environ.get('TRIGGER_DEDUP_SIZE', '4096'))
+_recorded_by_trace_id = OrderedDict()
+_record_lock = threading.Lock()
+
+# Transporte local opcional (datagramas UDP ou socket unix, ver trigger_ipc.py)
+# para o hotkey_helper na mesma máquina, sem HTTP/JSON por clique
+TRIGGER_IPC = os.environ.get('TRIGGER_IPC', '')
+_trigger_ipc = None
+
+
+def _record_ipc_trigger(item):
+    item = _trigger_item_from_payload(item, monotonic_ms(), 'ipc')
+    return _record_triggers([item], 'ipc')[0]
+
+
+if TRIGGER_IPC:
+    try:
+        _trigger_ipc = TriggerIpcListener(TRIGGER_IPC, _record_ipc_trigger).start()
+        atexit.register(_trigger_ipc.close)
+        logger.info(f"Recebendo triggers via IPC em {TRIGGER_IPC}")
+    except (OSError, ValueError) as e:
+        # Ex: outro worker já está escutando no mesmo endereço
+        logger.warning(f"TRIGGER_IPC desativado ({TRIGGER_IPC}): {e}")
+
+# Tempo máximo (segundos) que um cliente pode ficar aguardando em /trigger-wait
+TRIGGER_WAIT_MAX_S = float(os.environ.get('TRIGGER_WAIT_MAX_S', '25'))
+
+# Quantidade máxima de eventos aceitos por chamada a /trigger-add-steps
+TRIGGER_BATCH_MAX = int(os.environ.get('TRIGGER_BATCH_MAX', '500'))
+
+
+# Latências, contadores e atraso de entrega de triggers (GET /metrics)
+_metrics = MetricsRegistry()
+
+
+@app.before_request
+def _metrics_before_request():
+    g.metrics_route = request.url_rule.rule if request.url_rule else 'not_found'
+    g.metrics_start = time.perf_counter()
+    _metrics.request_started(g.metrics_route)
+
+
+@app.after_request
+def _metrics_after_request(response):
+    if 'metrics_start' in g:
+        _metrics.request_finished(g.metrics_route, request.method, response.status_code,
+                                  time.perf_counter() - g.metrics_start)
+        g.pop('metrics_start')
+    return response
+
+
+@app.teardown_request
+def _metrics_teardown_request(error):
+    # Exceção não tratada: after_request não rodou
+    if 'metrics_start' in g:
+        _metrics.request_finished(g.metrics_route, request.method, 500,
+                                  time.perf_counter() - g.pop('metrics_start'))
+
+
+# Cache em memória dos estáticos (ETag + variantes gzip/br pré-comprimidas)
+_static_cache = StaticAssetCache(app.root_path)
+_static_cache.preload('index.html')
+
+
+def _send_static(path):
+    """
+    Serve `path` do cache de estáticos, respondendo 304 quando o ETag do
+    cliente ainda vale. Arquivos fora do cache (grandes demais) ou inexistentes
+    seguem para send_from_directory, que dispara o 404 normalmente. Journal,
+    trace e fontes sob a mesma pasta são tratados como inexistentes.
+    """
+    if not _static_cache.is_public(path):
+        abort(404)
+    cached = _static_cache.respond(
+        path,
+        if_none_match=request.headers.get('If-None-Match'),
+        accept_encoding=request.headers.get('Accept-Encoding')
+    )
+    if cached is None:
+        return send_from_directory('.', path)
+    status, body, headers = cached
+    return Response(body, status=status, headers=headers)
 
 
 @app.route('/')
 def index():
     """Serve o arquivo HTML principal."""
-    return send_from_directory('.', 'index.html')
+    return _send_static('index.html')
 
 
 @app.route('/<path:path>')
 def static_proxy(path):
     """Serve arquivos estáticos (CSS, JS, imagens)."""
-    return send_from_directory('.', path)
+    return _send_static(path)
 
 
 @app.route('/health')
@@ -60,6 +223,128 @@ def _is_valid_coordinate(value):
     return isinstance(value, (int, float)) and not isinstance(value, bool)
 
 
+def _coordinates_from_payload(payload):
+    """Extrai (x, y) do payload, descartando valores que não são números."""
+    x = payload.get('x')
+    y = payload.get('y')
+    
+    # Apenas aceitar números válidos
+    if x is not None and not _is_valid_coordinate(x):
+        x = None
+    if y is not None and not _is_valid_coordinate(y):
+        y = None
+    return x, y
+
+
+def _trigger_item_from_payload(payload, recv_mono=None, transport='http'):
+    """
+    Converte um objeto {x, y, client_ts} no item aceito pelo trigger store.
+    Com TRIGGER_TRACE ativo, o item leva também os campos de rastreamento
+    (trace_id, client_mono, sent_mono) em `trace`.
+    """
+    x, y = _coordinates_from_payload(payload)
+    client_ts = payload.get('client_ts')
+    if client_ts is not None and not _is_valid_coordinate(client_ts):
+        client_ts = None
+    item = {'x': x, 'y': y, 'client_ts': client_ts, 'trace_id': trace_id_from_payload(payload)}
+    if _tracer is not None:
+        item['trace'] = trace_from_payload(payload, recv_mono, transport)
+    return item
+
+
+def _trigger_batch_from_payload(payload, recv_mono=None):
+    """
+    Valida o corpo de /trigger-add-steps (lista de {x, y, client_ts}, ou
+    {"events": [...]}) e retorna os itens. Levanta ValueError se inválido.
+    """
+    if isinstance(payload, dict):
+        payload = payload.get('events')
+    if not isinstance(payload, list):
+        raise ValueError('payload deve ser uma lista de eventos')
+    if len(payload) > TRIGGER_BATCH_MAX:
+        raise ValueError(f'lote com {len(payload)} eventos excede TRIGGER_BATCH_MAX={TRIGGER_BATCH_MAX}')
+    if not all(isinstance(item, dict) for item in payload):
+        raise ValueError('cada evento deve ser um objeto {x, y, client_ts}')
+    return [_trigger_item_from_payload(item, recv_mono, 'batch') for item in payload]
+
+
+def _record_triggers(items, transport='http'):
+    """
+    Grava os itens (de _trigger_item_from_payload) no store, acordando quem
+    está em /trigger-wait ou /trigger-events, repassa ao tracer e registra a
+    linha de log. Usado por HTTP (Flask e aiohttp) e IPC; retorna um evento
+    por item. Itens com trace_id já gravado devolvem o evento original.
+    """
+    with _record_lock:
+        # Posição em `items` do item que grava cada trace_id novo deste lote
+        fresh, first_by_trace_id = [], {}
+        for index, item in enumerate(items):
+            trace_id = item.get('trace_id')
+            if trace_id is None or (trace_id not in _recorded_by_trace_id
+                                    and trace_id not in first_by_trace_id):
+                fresh.append(index)
+                if trace_id is not None:
+                    first_by_trace_id[trace_id] = index
+        events = _trigger_store.append_many([items[index] for index in fresh])
+        result = [None] * len(items)
+        for index, event in zip(fresh, events):
+            result[index] = event
+        for index, item in enumerate(items):
+            if result[index] is None:
+                trace_id = item['trace_id']
+                first = first_by_trace_id.get(trace_id)
+                result[index] = result[first] if first is not None else _recorded_by_trace_id[trace_id]
+        for trace_id, index in first_by_trace_id.items():
+            _recorded_by_trace_id[trace_id] = result[index]
+        while len(_recorded_by_trace_id) > TRIGGER_DEDUP_SIZE:
+            _recorded_by_trace_id.popitem(last=False)
+    if len(fresh) < len(items):
+        logger.info(f"{len(items) - len(fresh)} trigger(s) repetido(s) ignorado(s) (trace_id já gravado)")
+    _trace_recorded(events, [items[index] for index in fresh])
+    # Formatação lazy: só acontece se o filtro deixar o registro passar
+    if transport == 'batch':
+        if events:
+            trigger_logger.info("Lote de triggers registrado: %s eventos, seq=%s..%s",
+                                len(events), events[0]['seq'], events[-1]['seq'],
+                                extra={'count': len(events)})
+    else:
+        for event in events:
+            trigger_logger.info("Trigger registrado (%s): seq=%s, ts=%s, x=%s, y=%s", transport,
+                                event['seq'], event['ts'], event['x'], event['y'], extra={'trigger': event})
+    return result
+
+
+def _clamp_wait_timeout(timeout):
+    """Limita o timeout de long-poll ao intervalo [0, TRIGGER_WAIT_MAX_S]."""
+    return max(0.0, min(timeout, TRIGGER_WAIT_MAX_S))
+
+
+def _events_since_payload(since):
+    """
+    Monta a resposta de /trigger-events para o cliente que já viu `since`.
+    `since` acima do último seq indica que o seq recomeçou (restart sem
+    journal): devolve o log desde o início com `reset` e o cliente recomeça
+    do `seq` recebido.
+    """
+    pending, last_seq = _trigger_store.events_since(since)
+    reset = since > last_seq
+    if reset:
+        since = 0
+        pending, last_seq = _trigger_store.events_since(since)
+    _observe_delivery(pending, '/trigger-events')
+    first_seq = pending[0]['seq'] if pending else last_seq + 1
+    dropped = max(0, first_seq - since - 1) if since < last_seq else 0
+    return {'events': pending, 'seq': last_seq, 'dropped': dropped, 'reset': reset}
+
+
+def _seq_changed(since):
+    """
+    Predicado de espera por seq: acorda com um trigger novo ou com o seq
+    abaixo de `since` (servidor reiniciado sem journal).
+    """
+    return lambda s: s['seq'] != since
+
+
 @app.route('/trigger-add-step', methods=['POST'])
 def trigger_add_step():
     """
@@ -68,63 +353,162 @@ def trigger_add_step():
     Payload esperado:
     {
         "x": <número opcional>,
-        "y": <número opcional>
+        "y": <número opcional>,
+        "client_ts": <timestamp_ms do clique no cliente, opcional>,
+        "trace_id", "client_mono", "sent_mono": <opcionais, ver trigger_trace.py>
     }
     
     Resposta:
     {
         "ok": true,
+        "seq": <sequência do evento>,
         "ts": <timestamp_ms>,
         "x": <x ou null>,
-        "y": <y ou null>
+        "y": <y ou null>,
+        "client_ts": <client_ts ou null>
     }
     """
+    recv_mono = monotonic_ms()
     try:
         payload = request.get_json(silent=True) or {}
         
         # Validar e extrair coordenadas
-        x = payload.get('x')
-        y = payload.get('y')
-        
-        # Apenas aceitar números válidos
-        if x is not None and not _is_valid_coordinate(x):
-            x = None
-        if y is not None and not _is_valid_coordinate(y):
-            y = None
-        
-        # Atualizar estado global
-        _trigger_state['ts'] = int(time.time() * 1000)
-        _trigger_state['x'] = x
-        _trigger_state['y'] = y
-        
-        logger.info(f"Trigger registrado: ts={_trigger_state['ts']}, x={x}, y={y}")
-        
-        return jsonify({
-            'ok': True,
-            'ts': _trigger_state['ts'],
-            'x': x,
-            'y': y
-        })
+        item = _trigger_item_from_payload(payload, recv_mono)
+        event = _record_triggers([item])[0]
+        return jsonify({'ok': True, **event})
     
     except Exception as e:
         logger.error(f"Erro ao processar /trigger-add-step: {e}")
         return jsonify({'ok': False, 'error': str(e)}), 400
 
 
+@app.route('/trigger-add-steps', methods=['POST'])
+def trigger_add_steps():
+    """
+    Registra um lote de triggers de uma vez (ex: rajada de cliques do helper).
+
+    Payload esperado:
+    [
+        {"x": <número opcional>, "y": <número opcional>, "client_ts": <opcional>},
+        ...
+    ]
+
+    Os eventos são validados numa única passada e gravados atomicamente, com
+    seqs consecutivos na ordem recebida.
+
+    Resposta:
+    {
+        "ok": true,
+        "count": <quantidade registrada>,
+        "events": [{"seq", "ts", "x", "y", "client_ts"}, ...]
+    }
+    """
+    recv_mono = monotonic_ms()
+    try:
+        items = _trigger_batch_from_payload(request.get_json(silent=True), recv_mono)
+    except ValueError as e:
+        return jsonify({'ok': False, 'error': str(e)}), 400
+
+    try:
+        events = _record_triggers(items, 'batch')
+    except Exception as e:
+        logger.error(f"Erro ao processar /trigger-add-steps: {e}")
+        return jsonify({'ok': False, 'error': str(e)}), 400
+    return jsonify({'ok': True, 'count': len(events), 'events': events})
+
+
 @app.route('/trigger-state', methods=['GET'])
 def get_trigger_state():
     """Retorna o estado atual do último trigger."""
-    return jsonify(_trigger_state)
+    state = _trigger_store.latest()
+    _observe_delivery([state], '/trigger-state')
+    return jsonify(state)
+
+
+def _newer_than(after, after_seq):
+    """
+    Predicado de /trigger-wait: por seq quando o cliente informa `after_seq`;
+    senão por ts (ms), que não distingue triggers do mesmo milissegundo.
+    """
+    if after_seq is not None:
+        return _seq_changed(after_seq)
+    return lambda s: s['ts'] > after
+
+
+@app.route('/trigger-wait', methods=['GET'])
+def wait_trigger_state():
+    """
+    Long-poll do estado do trigger.
+
+    Query string:
+        after_seq - último seq conhecido pelo cliente (preferível a `after`)
+        after     - último ts conhecido pelo cliente (padrão 0), se não houver after_seq
+        timeout   - segundos máximos de espera (limitado a TRIGGER_WAIT_MAX_S)
+
+    Responde assim que houver um trigger com seq > after_seq (ou ts > after),
+    ou logo se o seq atual for menor que after_seq (o seq recomeçou num
+    restart sem journal).
+    Se o tempo esgotar, devolve o estado atual (mesmo formato de
+    /trigger-state) e o cliente simplesmente repete a chamada com o mesmo valor.
+    """
+    after = request.args.get('after', 0, type=int)
+    after_seq = request.args.get('after_seq', None, type=int)
+    timeout = _clamp_wait_timeout(request.args.get('timeout', TRIGGER_WAIT_MAX_S, type=float))
+
+    state = _trigger_store.wait(_newer_than(after, after_seq), timeout)
+    _observe_delivery([state], '/trigger-wait')
+    return jsonify(state)
+
+
+@app.route('/trigger-events', methods=['GET'])
+def get_trigger_events():
+    """
+    Retorna, de uma vez, todos os triggers que o cliente ainda não viu.
+
+    Query string:
+        since   - último seq processado pelo cliente (padrão 0)
+        timeout - se > 0 e não houver eventos novos, aguarda como /trigger-wait
+
+    Resposta:
+    {
+        "events": [{"seq", "ts", "x", "y"}, ...],   # em ordem de seq
+        "seq": <maior seq conhecido>,
+        "dropped": <eventos perdidos por terem saído do log circular>,
+        "reset": <true se `since` era maior que o último seq: o seq recomeçou
+                  (restart sem journal) e `events` vem desde o início do log>
+    }
+    """
+    since = max(0, request.args.get('since', 0, type=int))
+    timeout = _clamp_wait_timeout(request.args.get('timeout', 0, type=float))
+
+    if timeout:
+        _trigger_store.wait(_seq_changed(since), timeout)
+    return jsonify(_events_since_payload(since))
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Expõe as métricas de requisição no formato texto do Prometheus."""
+    return Response(_metrics.render(), mimetype='text/plain; version=0.0.4')
 
 
 @app.errorhandler(404)
 def not_found(error):
     """Redireciona 404 para index.html (para suporte a SPA)."""
-    return send_from_directory('.', 'index.html'), 200
+    return _send_static('index.html')
 
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8010))
+    # "threaded" (Werkzeug, padrão) ou "async" (asyncio/aiohttp, ver server_async.py)
+    server_mode = os.environ.get('SERVER_MODE', 'threaded').lower()
     debug = os.environ.get('FLASK_ENV') == 'development'
-    logger.info(f"Iniciando servidor na porta {port} (debug={debug})")
-    app.run(host='0.0.0.0', port=port, debug=debug)
+    if server_mode == 'async':
+        # server_async faz "import server": reaproveitar este módulo (e o mesmo store)
+        sys.modules.setdefault('server', sys.modules[__name__])
+        from server_async import run_async
+        logger.info(f"Iniciando servidor assíncrono na porta {port}")
+        run_async(port)
+    else:
+        logger.info(f"Iniciando servidor na porta {port} (debug={debug})")
+        app.run(host='0.0.0.0', port=port, debug=debug)
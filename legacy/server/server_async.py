@@ -0,0 +1,240 @@
+"""
+Modo assíncrono (asyncio + aiohttp) do servidor de triggers.
+
+Serve as mesmas rotas de server.py (/health, /trigger-add-step(s), /trigger-state,
+/trigger-wait, /trigger-events, /metrics e arquivos estáticos com fallback para
+index.html), mas num único event loop: clientes em long-poll custam uma
+corrotina cada, e não uma thread.
+
+Uso:
+  SERVER_MODE=async python server.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+try:
+    from aiohttp import web
+except ImportError as e:
+    print(f"[erro] aiohttp não instalado (necessário para SERVER_MODE=async): {e}")
+    sys.exit(1)
+
+import server
+from server import logger
+from trigger_trace import monotonic_ms
+
+STATIC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Mesmas origens configuradas no flask_cors de server.py
+_CORS_ORIGINS = {
+    '/trigger-': {'localhost', '127.0.0.1'},
+    '/health': '*'
+}
+
+
+class _TriggerNotifier:
+    """Acorda as corrotinas em espera quando o store registra um trigger."""
+
+    def __init__(self, loop):
+        self._loop = loop
+        self._waiters = set()
+
+    def notify(self, events=None):
+        # O append pode ocorrer fora do event loop (ex: outra thread)
+        self._loop.call_soon_threadsafe(self._wake_all)
+
+    def _wake_all(self):
+        for future in self._waiters:
+            if not future.done():
+                future.set_result(None)
+        self._waiters.clear()
+
+    async def wait(self, predicate, timeout):
+        store = server._trigger_store
+        deadline = self._loop.time() + timeout
+        while True:
+            state = store.latest()
+            remaining = deadline - self._loop.time()
+            if predicate(state) or remaining <= 0:
+                return state
+            if store.poll_interval is not None:
+                remaining = min(remaining, store.poll_interval)
+            future = self._loop.create_future()
+            self._waiters.add(future)
+            try:
+                await asyncio.wait_for(future, remaining)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self._waiters.discard(future)
+
+
+def _query_number(request, name, default, cast):
+    try:
+        return cast(request.query.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+@web.middleware
+async def _cors_middleware(request, handler):
+    response = await handler(request)
+    origin = request.headers.get('Origin')
+    for prefix, allowed in _CORS_ORIGINS.items():
+        if request.path.startswith(prefix):
+            if allowed == '*':
+                response.headers['Access-Control-Allow-Origin'] = '*'
+            elif origin in allowed:
+                response.headers['Access-Control-Allow-Origin'] = origin
+                response.headers['Vary'] = 'Origin'
+            break
+    return response
+
+
+@web.middleware
+async def _metrics_middleware(request, handler):
+    resource = request.match_info.route.resource
+    route = resource.canonical if resource is not None else 'not_found'
+    start = time.perf_counter()
+    server._metrics.request_started(route)
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        server._metrics.request_finished(route, request.method, status, time.perf_counter() - start)
+
+
+async def health(request):
+    """Verifica saúde da aplicação."""
+    return web.json_response({'status': 'ok', 'timestamp': int(time.time() * 1000)})
+
+
+async def trigger_add_step(request):
+    """Registra um novo trigger (mesmo contrato de server.trigger_add_step)."""
+    recv_mono = monotonic_ms()
+    try:
+        try:
+            payload = await request.json()
+        except ValueError:
+            payload = None
+        if not isinstance(payload, dict):
+            payload = {}
+
+        item = server._trigger_item_from_payload(payload, recv_mono)
+        event = server._record_triggers([item])[0]
+        return web.json_response({'ok': True, **event})
+
+    except Exception as e:
+        logger.error(f"Erro ao processar /trigger-add-step: {e}")
+        return web.json_response({'ok': False, 'error': str(e)}, status=400)
+
+
+async def trigger_add_steps(request):
+    """Registra um lote de triggers (mesmo contrato de server.trigger_add_steps)."""
+    recv_mono = monotonic_ms()
+    try:
+        try:
+            payload = await request.json()
+        except ValueError:
+            payload = None
+        items = server._trigger_batch_from_payload(payload, recv_mono)
+    except ValueError as e:
+        return web.json_response({'ok': False, 'error': str(e)}, status=400)
+
+    try:
+        events = server._record_triggers(items, 'batch')
+    except Exception as e:
+        logger.error(f"Erro ao processar /trigger-add-steps: {e}")
+        return web.json_response({'ok': False, 'error': str(e)}, status=400)
+    return web.json_response({'ok': True, 'count': len(events), 'events': events})
+
+
+async def get_trigger_state(request):
+    """Retorna o estado atual do último trigger."""
+    state = server._trigger_store.latest()
+    server._observe_delivery([state], '/trigger-state')
+    return web.json_response(state)
+
+
+async def wait_trigger_state(request):
+    """Long-poll do estado do trigger (ver server.wait_trigger_state)."""
+    after = _query_number(request, 'after', 0, int)
+    after_seq = _query_number(request, 'after_seq', None, int)
+    timeout = server._clamp_wait_timeout(
+        _query_number(request, 'timeout', server.TRIGGER_WAIT_MAX_S, float))
+
+    state = await request.app['notifier'].wait(server._newer_than(after, after_seq), timeout)
+    server._observe_delivery([state], '/trigger-wait')
+    return web.json_response(state)
+
+
+async def get_trigger_events(request):
+    """Retorna todos os triggers com seq > since (ver server.get_trigger_events)."""
+    since = max(0, _query_number(request, 'since', 0, int))
+    timeout = server._clamp_wait_timeout(_query_number(request, 'timeout', 0, float))
+
+    if timeout:
+        await request.app['notifier'].wait(server._seq_changed(since), timeout)
+    return web.json_response(server._events_since_payload(since))
+
+
+async def metrics(request):
+    """Expõe as métricas de requisição no formato texto do Prometheus."""
+    return web.Response(text=server._metrics.render(), content_type='text/plain',
+                        headers={'X-Content-Type-Options': 'nosniff'})
+
+
+async def static_proxy(request):
+    """Serve arquivos estáticos; caminhos inexistentes caem em index.html (SPA)."""
+    rel_path = request.match_info.get('path', '') or 'index.html'
+    path = os.path.abspath(os.path.join(STATIC_DIR, rel_path))
+    if (not path.startswith(STATIC_DIR + os.sep) or not os.path.isfile(path)
+            or not server._static_cache.is_public(rel_path)):
+        rel_path = 'index.html'
+        path = os.path.join(STATIC_DIR, rel_path)
+
+    cached = server._static_cache.respond(
+        rel_path,
+        if_none_match=request.headers.get('If-None-Match'),
+        accept_encoding=request.headers.get('Accept-Encoding')
+    )
+    if cached is not None:
+        status, body, headers = cached
+        return web.Response(body=body, status=status, headers=headers)
+    # Fora do cache (arquivo grande): envio direto do disco
+    if not os.path.isfile(path):
+        raise web.HTTPNotFound()
+    return web.FileResponse(path)
+
+
+async def _on_startup(app):
+    notifier = _TriggerNotifier(asyncio.get_running_loop())
+    server._trigger_store.subscribe(notifier.notify)
+    app['notifier'] = notifier
+
+
+def create_app():
+    """Cria a aplicação aiohttp com as mesmas rotas do app Flask."""
+    app = web.Application(middlewares=[_metrics_middleware, _cors_middleware])
+    app.on_startup.append(_on_startup)
+    app.router.add_get('/health', health)
+    app.router.add_post('/trigger-add-step', trigger_add_step)
+    app.router.add_post('/trigger-add-steps', trigger_add_steps)
+    app.router.add_get('/trigger-state', get_trigger_state)
+    app.router.add_get('/trigger-wait', wait_trigger_state)
+    app.router.add_get('/trigger-events', get_trigger_events)
+    app.router.add_get('/metrics', metrics)
+    app.router.add_get('/', static_proxy)
+    app.router.add_get('/{path:.*}', static_proxy)
+    return app
+
+
+def run_async(port):
+    web.run_app(create_app(), host='0.0.0.0', port=port, print=None)
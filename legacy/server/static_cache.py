@@ -0,0 +1,177 @@
+"""
+Cache em memória dos arquivos estáticos servidos por server.py.
+
+Cada arquivo é lido do disco uma única vez por versão (chave: caminho + mtime +
+tamanho). Na primeira leitura são calculados o ETag forte e as variantes
+pré-comprimidas (gzip e, se o módulo `brotli` estiver instalado, br). As
+respostas seguintes vêm da memória e pedidos com If-None-Match recebem
+304 Not Modified.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from email.utils import formatdate
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Tipos que já são comprimidos: não vale a pena gerar gzip/br
+_INCOMPRESSIBLE_TYPES = ('image/png', 'image/jpeg', 'image/gif', 'image/webp',
+                         'font/woff', 'font/woff2', 'application/zip',
+                         'application/gzip', 'application/pdf')
+
+# Arquivos menores que isso não são comprimidos
+_MIN_COMPRESS_SIZE = 1024
+
+# Dados e código que podem estar sob a raiz (journal, trace, snapshot, fontes):
+# nunca servidos, mesmo que TRIGGER_JOURNAL/TRIGGER_TRACE apontem para cá
+_PRIVATE_SUFFIXES = ('.jsonl', '.snapshot', '.tmp', '.py', '.pyc',
+                     '.sqlite3', '.db', '.log')
+
+
+class StaticAsset:
+    """Conteúdo de um arquivo estático com suas variantes comprimidas."""
+
+    def __init__(self, path, data, stat):
+        self.path = path
+        self.mtime_ns = stat.st_mtime_ns
+        self.size = stat.st_size
+        self.mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if self.mimetype.startswith('text/') or self.mimetype == 'application/javascript':
+            self.content_type = f'{self.mimetype}; charset=utf-8'
+        else:
+            self.content_type = self.mimetype
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        digest = hashlib.sha256(data).hexdigest()[:32]
+        # Cada codificação é uma representação diferente: ETags distintos
+        self.variants = {None: (data, f'"{digest}"')}
+        if len(data) >= _MIN_COMPRESS_SIZE and not self.mimetype.startswith(_INCOMPRESSIBLE_TYPES):
+            gz = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(gz) < len(data):
+                self.variants['gzip'] = (gz, f'"{digest}-gz"')
+            if brotli is not None:
+                br = brotli.compress(data, quality=11)
+                if len(br) < len(data):
+                    self.variants['br'] = (br, f'"{digest}-br"')
+
+    def is_current(self, stat):
+        return stat.st_mtime_ns == self.mtime_ns and stat.st_size == self.size
+
+
+def _accepted_encodings(accept_encoding):
+    """Codificações aceitas pelo cliente (ignora as com q=0)."""
+    accepted = set()
+    for part in (accept_encoding or '').split(','):
+        token, _, params = part.strip().partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = params.strip().lower()
+        if q.startswith('q=') and q[2:].strip() in ('0', '0.0', '0.00', '0.000'):
+            continue
+        accepted.add(token)
+    return accepted
+
+
+def _etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    # If-None-Match usa comparação fraca: ignorar o prefixo W/
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+class StaticAssetCache:
+    """
+    Cache de arquivos estáticos sob `root`.
+
+    respond() devolve (status, body, headers) prontos para Flask ou aiohttp,
+    ou None se o arquivo não existir. Arquivos maiores que `max_file_size`
+    não são mantidos em memória: respond() também devolve None e o chamador
+    usa o envio direto do framework.
+    """
+
+    def __init__(self, root, max_file_size=4 * 1024 * 1024):
+        self.root = os.path.abspath(root)
+        self.max_file_size = max_file_size
+        self._assets = {}
+        self._lock = threading.Lock()
+
+    def _resolve(self, rel_path):
+        path = os.path.abspath(os.path.join(self.root, rel_path))
+        if not path.startswith(self.root + os.sep) or not self.is_public(rel_path):
+            return None
+        return path
+
+    @staticmethod
+    def is_public(rel_path):
+        """False para arquivos de dados, fontes e caminhos ocultos (ex: .git, __pycache__)."""
+        parts = rel_path.replace('\\', '/').split('/')
+        if any(part.startswith('.') or part == '__pycache__' for part in parts if part):
+            return False
+        return not rel_path.lower().endswith(_PRIVATE_SUFFIXES)
+
+    def get(self, rel_path):
+        """Retorna o StaticAsset atualizado para `rel_path`, ou None."""
+        path = self._resolve(rel_path)
+        if path is None:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if not os.path.isfile(path) or stat.st_size > self.max_file_size:
+            return None
+
+        asset = self._assets.get(path)
+        if asset is not None and asset.is_current(stat):
+            return asset
+
+        with self._lock:
+            asset = self._assets.get(path)
+            if asset is None or not asset.is_current(stat):
+                with open(path, 'rb') as f:
+                    asset = StaticAsset(path, f.read(), stat)
+                self._assets[path] = asset
+        return asset
+
+    def preload(self, *rel_paths):
+        """Carrega (e comprime) os arquivos informados antes do primeiro pedido."""
+        for rel_path in rel_paths:
+            self.get(rel_path)
+
+    def respond(self, rel_path, if_none_match=None, accept_encoding=None):
+        asset = self.get(rel_path)
+        if asset is None:
+            return None
+
+        accepted = _accepted_encodings(accept_encoding)
+        encoding = next((enc for enc in ('br', 'gzip') if enc in asset.variants and enc in accepted), None)
+        body, etag = asset.variants[encoding]
+
+        headers = {
+            'ETag': etag,
+            'Last-Modified': asset.last_modified,
+            'Cache-Control': 'no-cache',
+        }
+        if len(asset.variants) > 1:
+            headers['Vary'] = 'Accept-Encoding'
+        if _etag_matches(if_none_match, etag):
+            return 304, b'', headers
+
+        headers['Content-Type'] = asset.content_type
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        return 200, body, headers
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Resumo por trecho da latência dos triggers rastreados (arquivo de TRIGGER_TRACE).
+
+Trechos (ms, relógio monotônico da máquina):
+  helper     clique -> envio pelo hotkey_helper (fila + spool)
+  transport  envio -> chegada ao servidor
+  server     chegada -> gravação no trigger store
+  delivery   gravação -> primeira entrega ao painel
+  total      clique -> primeira entrega
+
+Exemplos:
+  python trace_report.py triggers_trace.jsonl
+  python trace_report.py triggers_trace.jsonl --by transport --last 500
+  python trace_report.py triggers_trace.jsonl --json
+"""
+
+import argparse
+import json
+import sys
+from collections import deque
+
+HOPS = (
+    ('helper', 'client_mono', 'sent_mono'),
+    ('transport', 'sent_mono', 'recv_mono'),
+    ('server', 'recv_mono', 'recorded_mono'),
+    ('delivery', 'recorded_mono', 'deliver_mono'),
+    ('total', 'client_mono', 'deliver_mono'),
+)
+
+
+def _percentile(sorted_values, pct):
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def _read_traces(path, last=None):
+    traces = deque(maxlen=last)
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                traces.append(json.loads(line))
+            except ValueError:
+                pass  # linha truncada (servidor encerrado no meio da escrita)
+    return list(traces)
+
+
+def summarize(traces):
+    """Estatísticas por trecho; valores negativos (relógios de máquinas diferentes) são ignorados."""
+    report = {'traces': len(traces),
+              'undelivered': sum(1 for t in traces if t.get('deliver_mono') is None),
+              'hops': {}}
+    for name, start, end in HOPS:
+        values = []
+        invalid = 0
+        for trace in traces:
+            if trace.get(start) is None or trace.get(end) is None:
+                continue
+            value = trace[end] - trace[start]
+            if value < 0:
+                invalid += 1
+            else:
+                values.append(value)
+        values.sort()
+        stats = {'count': len(values), 'invalid': invalid}
+        if values:
+            stats.update({
+                'mean_ms': round(sum(values) / len(values), 3),
+                'p50_ms': round(_percentile(values, 50), 3),
+                'p95_ms': round(_percentile(values, 95), 3),
+                'p99_ms': round(_percentile(values, 99), 3),
+                'max_ms': round(values[-1], 3),
+            })
+        report['hops'][name] = stats
+    return report
+
+
+def _print_table(title, report):
+    print(f"{title}: {report['traces']} triggers, {report['undelivered']} sem entrega")
+    print(f"  {'trecho':<10} {'n':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9} {'média':>9}")
+    for name, stats in report['hops'].items():
+        if not stats['count']:
+            print(f"  {name:<10} {0:>7} {'-':>9} {'-':>9} {'-':>9} {'-':>9} {'-':>9}")
+            continue
+        print(f"  {name:<10} {stats['count']:>7} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} "
+              f"{stats['p99_ms']:>9.2f} {stats['max_ms']:>9.2f} {stats['mean_ms']:>9.2f}"
+              + (f"  ({stats['invalid']} negativos ignorados)" if stats['invalid'] else ''))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('path', help='arquivo JSON lines gravado via TRIGGER_TRACE')
+    parser.add_argument('--by', choices=('transport', 'route'),
+                        help='separa o resumo por transporte (http/batch/ipc) ou rota de entrega')
+    parser.add_argument('--last', type=int, help='considera só os N traces mais recentes')
+    parser.add_argument('--json', action='store_true', help='imprime o relatório em JSON')
+    args = parser.parse_args(argv)
+
+    try:
+        traces = _read_traces(args.path, args.last)
+    except OSError as e:
+        print(f"[erro] não foi possível ler {args.path}: {e}", file=sys.stderr)
+        return 1
+
+    groups = {'todos': traces}
+    if args.by:
+        for trace in traces:
+            groups.setdefault(f"{args.by}={trace.get(args.by)}", []).append(trace)
+    reports = {name: summarize(group) for name, group in groups.items()}
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return 0
+    for name, report in reports.items():
+        _print_table(name, report)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
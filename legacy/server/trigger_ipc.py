@@ -0,0 +1,171 @@
+"""
+Transporte local (sem HTTP) para triggers vindos do hotkey_helper.py.
+
+Com TRIGGER_IPC definido, server.py abre um socket de datagramas e registra
+cada mensagem recebida no trigger store, como um POST /trigger-add-step:
+  TRIGGER_IPC=udp:127.0.0.1:8011
+  TRIGGER_IPC=unix:/tmp/homolog-trigger.sock     (Linux/macOS)
+
+Mensagem binária (little-endian, 28 bytes):
+  magic  2s  b'HT'
+  versão B   1
+  flags  B   bit0 tem x, bit1 tem y, bit2 tem client_ts,
+             bit3 x inteiro, bit4 y inteiro, bit5 client_ts inteiro
+  x      d
+  y      d
+  client_ts d  (ms desde epoch)
+
+Versão 2 (52 bytes): mesmos campos da versão 1 seguidos do rastreamento de
+latência (ver trigger_trace.py); NaN = ausente:
+  trace_id    8s  8 bytes (16 caracteres hex no JSON)
+  client_mono d   time.monotonic() do clique, ms
+  sent_mono   d   time.monotonic() do envio, ms
+
+Depois de gravar o trigger o listener responde ao remetente (se ele tiver
+endereço) com uma confirmação (19 bytes). Sem ela o cliente não sabe se o
+datagrama chegou: com UDP, uma porta sem listener só vira erro no envio seguinte.
+  magic    2s  b'HA'
+  versão   B   1
+  trace_id 8s  o da mensagem (zeros na versão 1)
+  seq      q   seq do evento gravado
+
+O hotkey_helper.py mantém uma cópia deste formato; altere os dois juntos.
+"""
+
+import logging
+import os
+import socket
+import struct
+import threading
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'HT'
+VERSION = 1
+MESSAGE = struct.Struct('<2sBBddd')
+TRACED_VERSION = 2
+TRACED_MESSAGE = struct.Struct('<2sBBddd8sdd')
+ACK_MAGIC = b'HA'
+ACK_VERSION = 1
+ACK = struct.Struct('<2sB8sq')
+
+_FIELDS = (('x', 1, 8), ('y', 2, 16), ('client_ts', 4, 32))
+
+
+def encode_trigger(x=None, y=None, client_ts=None, trace_id=None, client_mono=None, sent_mono=None):
+    """
+    Codifica um trigger no formato binário do transporte local (versão 2 se
+    `trace_id`, 16 caracteres hex, for informado).
+    """
+    flags = 0
+    values = []
+    for (name, has_flag, int_flag), value in zip(_FIELDS, (x, y, client_ts)):
+        if value is None:
+            values.append(0.0)
+            continue
+        flags |= has_flag
+        if isinstance(value, int):
+            flags |= int_flag
+        values.append(float(value))
+    if trace_id is None:
+        return MESSAGE.pack(MAGIC, VERSION, flags, *values)
+    monos = [float('nan') if v is None else float(v) for v in (client_mono, sent_mono)]
+    return TRACED_MESSAGE.pack(MAGIC, TRACED_VERSION, flags, *values, bytes.fromhex(trace_id), *monos)
+
+
+def decode_trigger(data):
+    """Decodifica uma mensagem; levanta ValueError se não for um trigger válido."""
+    if len(data) == MESSAGE.size:
+        expected_version = VERSION
+        magic, version, flags, *values = MESSAGE.unpack(data)
+    elif len(data) == TRACED_MESSAGE.size:
+        expected_version = TRACED_VERSION
+        magic, version, flags, *values = TRACED_MESSAGE.unpack(data)
+    else:
+        raise ValueError(f'tamanho inválido: {len(data)} bytes')
+    if magic != MAGIC or version != expected_version:
+        raise ValueError('magic/versão desconhecidos')
+    item = {}
+    for (name, has_flag, int_flag), value in zip(_FIELDS, values):
+        if not flags & has_flag or value != value:  # ausente ou NaN
+            item[name] = None
+        else:
+            item[name] = int(value) if flags & int_flag else value
+    if version == TRACED_VERSION:
+        trace_id, client_mono, sent_mono = values[3:]
+        item['trace_id'] = trace_id.hex()
+        item['client_mono'] = None if client_mono != client_mono else client_mono
+        item['sent_mono'] = None if sent_mono != sent_mono else sent_mono
+    return item
+
+
+def encode_ack(trace_id, seq):
+    """Confirmação do trigger `trace_id` (None na versão 1), gravado com `seq`."""
+    return ACK.pack(ACK_MAGIC, ACK_VERSION, bytes.fromhex(trace_id) if trace_id else bytes(8), seq)
+
+
+def parse_address(spec):
+    """'udp:host:porta' ou 'unix:/caminho' -> (família, endereço)."""
+    kind, _, rest = spec.partition(':')
+    if kind == 'udp':
+        host, _, port = rest.rpartition(':')
+        return socket.AF_INET, (host or '127.0.0.1', int(port))
+    if kind == 'unix':
+        if not hasattr(socket, 'AF_UNIX'):
+            raise ValueError('sockets unix não são suportados nesta plataforma')
+        return socket.AF_UNIX, rest
+    raise ValueError(f"endereço IPC inválido: {spec} (use udp:host:porta ou unix:/caminho)")
+
+
+class TriggerIpcListener:
+    """
+    Thread que recebe datagramas de trigger, os grava no store e confirma ao
+    remetente. `on_trigger(item)` retorna o evento gravado.
+    """
+
+    def __init__(self, spec, on_trigger):
+        self.spec = spec
+        self.on_trigger = on_trigger
+        self.invalid = 0
+        family, self.address = parse_address(spec)
+        self._sock = socket.socket(family, socket.SOCK_DGRAM)
+        if family == socket.AF_UNIX and os.path.exists(self.address):
+            os.remove(self.address)  # socket antigo de uma execução anterior
+        self._sock.bind(self.address)
+        self._thread = threading.Thread(target=self._run, name='trigger-ipc', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            try:
+                data, sender = self._sock.recvfrom(TRACED_MESSAGE.size + 1)
+            except OSError:
+                if self._sock.fileno() == -1:
+                    return  # socket fechado
+                continue  # ex: Windows reporta aqui o ICMP de uma confirmação não entregue
+            try:
+                item = decode_trigger(data)
+            except ValueError as e:
+                self.invalid += 1
+                logger.warning(f"Mensagem IPC ignorada: {e}")
+                continue
+            try:
+                event = self.on_trigger(item)
+            except Exception as e:
+                # Sem confirmação: o cliente reenvia por HTTP
+                logger.error(f"Erro ao registrar trigger IPC: {e}")
+                continue
+            if not sender:
+                continue  # socket unix sem endereço: não há para onde responder
+            try:
+                self._sock.sendto(encode_ack(item.get('trace_id'), event['seq']), sender)
+            except OSError as e:
+                logger.warning(f"Confirmação IPC não enviada para {sender}: {e}")
+
+    def close(self):
+        self._sock.close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)
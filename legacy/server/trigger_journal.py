@@ -0,0 +1,178 @@
+"""
+Journal em disco (append-only, JSON lines) dos triggers registrados por server.py.
+
+Arquivos gerados a partir de TRIGGER_JOURNAL=<caminho>:
+  <caminho>           - journal: um evento por linha, só cresce até a compactação
+  <caminho>.snapshot  - snapshot compacto com os últimos eventos (até `capacity`)
+
+Escrita com group commit: record() só enfileira; uma thread de fundo grava
+tudo o que chegou, faz um único flush + fsync por grupo (no máximo a cada
+`flush_interval` segundos) e, quando o journal passa de `snapshot_every`
+linhas, grava um novo snapshot (tmp + os.replace) e trunca o journal.
+
+No startup, replay() lê o snapshot e só a cauda do journal (seq maior que o
+do snapshot), descartando do arquivo uma última linha truncada por crash para
+que o próximo append comece numa linha nova. Os eventos recuperados ficam em
+ordem de seq mesmo que o journal os tenha recebido fora de ordem.
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class TriggerJournal:
+    """Journal append-only com snapshot para o log de triggers."""
+
+    def __init__(self, path, capacity=1024, flush_interval=0.05, snapshot_every=10000):
+        self.path = os.path.abspath(path)
+        self.snapshot_path = self.path + '.snapshot'
+        self.flush_interval = flush_interval
+        self.snapshot_every = snapshot_every
+        self._recent = deque(maxlen=capacity)
+        self._queue = queue.Queue()
+        self._lines = 0
+        self._file = None
+        self._thread = None
+
+    # ------------------------------------------------------------------
+    # Replay
+    # ------------------------------------------------------------------
+
+    def _read_snapshot(self):
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return 0, []
+        except (OSError, ValueError) as e:
+            logger.error(f"Snapshot de triggers ilegível ({self.snapshot_path}): {e}")
+            return 0, []
+        return snapshot.get('seq', 0), snapshot.get('events', [])
+
+    def _read_tail(self, after_seq):
+        events = []
+        try:
+            with open(self.path, 'r+b') as f:
+                # Fim da última linha completa e válida; o que vier depois é
+                # resto de uma escrita interrompida por crash
+                valid_end = 0
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        logger.warning(f"Linha inválida ignorada no journal {self.path}")
+                        continue
+                    if not line.endswith(b'\n'):
+                        continue
+                    valid_end = f.tell()
+                    self._lines += 1
+                    if event.get('seq', 0) > after_seq:
+                        events.append(event)
+                # Sem isso o próximo append do start() emendaria na linha parcial
+                if f.seek(0, os.SEEK_END) > valid_end:
+                    logger.warning(f"Cauda incompleta descartada do journal {self.path}")
+                    f.truncate(valid_end)
+                    f.flush()
+                    os.fsync(f.fileno())
+        except FileNotFoundError:
+            pass
+        return events
+
+    def _merge(self, events):
+        """Junta eventos a _recent mantendo-o em ordem de seq e sem seqs repetidos."""
+        events = sorted(events, key=lambda event: event['seq'])
+        if not events:
+            return
+        if self._recent and events[0]['seq'] <= self._recent[-1]['seq']:
+            merged = {event['seq']: event for event in self._recent}
+            merged.update((event['seq'], event) for event in events)
+            events = [merged[seq] for seq in sorted(merged)]
+            self._recent.clear()
+        self._recent.extend(events)
+
+    def replay(self):
+        """Retorna os eventos recuperados (snapshot + cauda), em ordem de seq."""
+        snapshot_seq, events = self._read_snapshot()
+        self._merge(events)
+        # Um journal não truncado após o snapshot pode repetir seqs: _merge descarta
+        self._merge(self._read_tail(snapshot_seq))
+        return list(self._recent)
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Abre o journal para append e inicia a thread de group commit."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._thread = threading.Thread(target=self._run, name='trigger-journal', daemon=True)
+        self._thread.start()
+
+    def record(self, events):
+        """Enfileira eventos para gravação (não bloqueia o request)."""
+        self._queue.put(events)
+
+    def close(self):
+        """Grava o que estiver pendente, gera o snapshot final e fecha o arquivo."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            # Agrupar tudo que chegar dentro da janela de flush
+            deadline = time.monotonic() + self.flush_interval
+            try:
+                while batch[-1] is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                pass
+            if None in batch:
+                running = False
+            try:
+                self._write([e for events in batch if events for e in events])
+                if not running or self._lines >= self.snapshot_every:
+                    self._write_snapshot()
+            except OSError as e:
+                logger.error(f"Erro ao gravar journal de triggers: {e}")
+        self._file.close()
+
+    def _write(self, events):
+        if not events:
+            return
+        self._file.write(''.join(json.dumps(e, separators=(',', ':')) + '\n' for e in events))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._merge(events)
+        self._lines += len(events)
+
+    def _write_snapshot(self):
+        # _recent está em ordem de seq: o último é o maior
+        events = list(self._recent)
+        snapshot = {'seq': events[-1]['seq'] if events else 0, 'events': events}
+        tmp_path = self.snapshot_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        # Só depois do snapshot durável o journal pode ser truncado
+        self._file.truncate(0)
+        self._file.seek(0)
+        os.fsync(self._file.fileno())
+        self._lines = 0
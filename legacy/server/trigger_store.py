@@ -0,0 +1,347 @@
+"""
+Backends de armazenamento do estado de triggers usados por server.py.
+
+Backends disponíveis (selecionados pela variável TRIGGER_STORE):
+  memory - dict + deque no próprio processo (padrão; um único worker)
+  shm    - log circular em multiprocessing.shared_memory, compartilhado entre
+           todos os workers da máquina (ex: gunicorn -w 4). Escrita protegida
+           por flock; leitura sem lock via seqlock.
+
+Todos os backends expõem a mesma interface:
+  append(x, y, client_ts=None)
+                        -> evento registrado {'seq', 'ts', 'x', 'y', 'client_ts'}
+  append_many(items)    -> registra atomicamente uma lista de {'x', 'y', 'client_ts'}
+                           (seqs consecutivos) e retorna os eventos
+  latest()              -> último evento (seq=0/ts=0 se ainda não houve trigger)
+  events_since(since)   -> (eventos com seq > since em ordem, último seq)
+  wait(predicate, t)    -> aguarda predicate(latest()) por até t segundos
+  restore(events)       -> recarrega eventos já persistidos (ex: journal) no startup
+  subscribe(callback)   -> callback(events) é chamado após cada append deste processo,
+                           ainda sob o lock de escrita (em ordem de seq; não deve bloquear)
+  poll_interval         -> None se subscribe cobre todos os appends; senão o
+                           intervalo (s) em que clientes assíncronos devem consultar
+"""
+
+import logging
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+def _empty_state():
+    return {'seq': 0, 'ts': 0, 'x': None, 'y': None, 'client_ts': None}
+
+
+class _Appender:
+    """append() de um único evento em termos de append_many()."""
+
+    def append(self, x, y, client_ts=None):
+        return self.append_many([{'x': x, 'y': y, 'client_ts': client_ts}])[0]
+
+
+class _Subscribers:
+    """Lista de callbacks notificados após cada append."""
+
+    def __init__(self):
+        self._subscribers = []
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def _notify_subscribers(self, events):
+        for callback in self._subscribers:
+            callback(events)
+
+
+class MemoryTriggerStore(_Appender, _Subscribers):
+    """Estado em memória do processo atual (comportamento original)."""
+
+    poll_interval = None
+
+    def __init__(self, capacity=1024):
+        super().__init__()
+        self._state = _empty_state()
+        self._events = deque(maxlen=capacity)
+        self._cond = threading.Condition()
+
+    def append_many(self, items):
+        with self._cond:
+            ts = int(time.time() * 1000)
+            seq = self._state['seq']
+            events = []
+            for item in items:
+                seq += 1
+                event = {
+                    'seq': seq,
+                    'ts': ts,
+                    'x': item.get('x'),
+                    'y': item.get('y'),
+                    'client_ts': item.get('client_ts')
+                }
+                self._events.append(event)
+                events.append(dict(event))
+            if events:
+                self._state.update(events[-1])
+                self._cond.notify_all()
+                # Ainda sob o lock: assinantes (ex: journal) recebem os lotes em ordem de seq
+                self._notify_subscribers(events)
+        return events
+
+    def restore(self, events):
+        events = sorted(events, key=lambda event: event['seq'])
+        with self._cond:
+            for event in events:
+                self._events.append({**_empty_state(), **event})
+            if events:
+                self._state.update(self._events[-1])
+
+    def latest(self):
+        with self._cond:
+            return dict(self._state)
+
+    def events_since(self, since):
+        with self._cond:
+            last_seq = self._state['seq']
+            # O log é ordenado por seq: percorrer do fim até alcançar `since`
+            pending = []
+            for event in reversed(self._events):
+                if event['seq'] <= since:
+                    break
+                pending.append(dict(event))
+        pending.reverse()
+        return pending, last_seq
+
+    def wait(self, predicate, timeout):
+        with self._cond:
+            self._cond.wait_for(lambda: predicate(self._state), timeout=timeout)
+            return dict(self._state)
+
+
+# ----------------------------------------------------------------------------
+# Backend em memória compartilhada
+# ----------------------------------------------------------------------------
+
+# Cabeçalho: versão do seqlock, último seq, capacidade do log, tamanho do slot
+_HEADER = struct.Struct('<QQQI4x')
+# Slot: seq, ts, x, y, client_ts, flags (bits abaixo)
+_SLOT = struct.Struct('<QqdddB7x')
+
+_HAS_X, _HAS_Y, _INT_X, _INT_Y, _HAS_CLIENT_TS, _INT_CLIENT_TS = 1, 2, 4, 8, 16, 32
+
+
+def _pack_coord(value, has_flag, int_flag):
+    if value is None:
+        return 0.0, 0
+    flags = has_flag | (int_flag if isinstance(value, int) else 0)
+    return float(value), flags
+
+
+def _unpack_coord(value, flags, has_flag, int_flag):
+    if not flags & has_flag:
+        return None
+    return int(value) if flags & int_flag else value
+
+
+class SharedMemoryTriggerStore(_Appender, _Subscribers):
+    """
+    Log circular de triggers num segmento de memória compartilhada nomeado.
+
+    Escritores (append) serializam via flock num arquivo de lock + lock de
+    thread. Leitores não travam: copiam o segmento e repetem a leitura se a
+    versão do seqlock mudou ou estava ímpar (escrita em andamento). Depois de
+    READ_SPINS tentativas o leitor lê sob o flock; uma versão ímpar deixada por
+    um escritor que morreu no meio da escrita é corrigida pelo próximo a travar.
+
+    O segmento persiste após o término dos workers para que um worker
+    reiniciado pelo gunicorn reencontre o histórico; use unlink() para removê-lo.
+    """
+
+    READ_SPINS = 1000
+
+    def __init__(self, capacity=1024, name='homolog_triggers', poll_interval=0.02):
+        try:
+            import fcntl
+        except ImportError:
+            raise RuntimeError("TRIGGER_STORE=shm requer fcntl (Linux/macOS)")
+        from multiprocessing import shared_memory
+
+        super().__init__()
+        self._fcntl = fcntl
+        # Appends de outros workers não notificam este processo
+        self.poll_interval = poll_interval
+        self._thread_lock = threading.Lock()
+        self._lock_file = open(os.path.join(tempfile.gettempdir(), f'{name}.lock'), 'a+b')
+
+        size = _HEADER.size + capacity * _SLOT.size
+        with self._write_lock():
+            try:
+                self._shm = self._open_shm(shared_memory, name, True, size)
+                _HEADER.pack_into(self._shm.buf, 0, 0, 0, capacity, _SLOT.size)
+            except FileExistsError:
+                self._shm = self._open_shm(shared_memory, name, False, 0)
+        self._buf = self._shm.buf
+        # A capacidade gravada por quem criou o segmento prevalece
+        _, _, self._capacity, slot_size = _HEADER.unpack_from(self._buf, 0)
+        if slot_size != _SLOT.size:
+            raise RuntimeError(
+                f"Segmento '{name}' usa outro layout (slot={slot_size}); remova-o "
+                f"(SharedMemoryTriggerStore.unlink) ou use outro TRIGGER_STORE_SHM_NAME")
+
+    @staticmethod
+    def _open_shm(shared_memory, name, create, size):
+        try:
+            return shared_memory.SharedMemory(name=name, create=create, size=size, track=False)
+        except TypeError:
+            # Python < 3.13: sem `track`, desregistrar do resource_tracker para o
+            # segmento não ser removido quando este worker encerrar
+            shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+            return shm
+
+    @contextmanager
+    def _write_lock(self):
+        with self._thread_lock:
+            self._fcntl.flock(self._lock_file, self._fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                self._fcntl.flock(self._lock_file, self._fcntl.LOCK_UN)
+
+    def _begin_write(self):
+        """Marca escrita em andamento (versão ímpar); chamar sob _write_lock."""
+        version, last_seq, capacity, slot_size = _HEADER.unpack_from(self._buf, 0)
+        # Ímpar aqui, com o lock na mão, é escrita interrompida (worker morto):
+        # arredondar para par antes de começar, senão a paridade fica invertida
+        version += version & 1
+        _HEADER.pack_into(self._buf, 0, version + 1, last_seq, capacity, slot_size)
+        return version, last_seq, capacity, slot_size
+
+    def _slot_offset(self, seq):
+        return _HEADER.size + ((seq - 1) % self._capacity) * _SLOT.size
+
+    def append_many(self, items):
+        packed = []
+        for item in items:
+            fx, flags_x = _pack_coord(item.get('x'), _HAS_X, _INT_X)
+            fy, flags_y = _pack_coord(item.get('y'), _HAS_Y, _INT_Y)
+            fc, flags_c = _pack_coord(item.get('client_ts'), _HAS_CLIENT_TS, _INT_CLIENT_TS)
+            packed.append((fx, fy, fc, flags_x | flags_y | flags_c))
+        if not packed:
+            return []
+
+        events = []
+        with self._write_lock():
+            version, last_seq, capacity, slot_size = self._begin_write()
+            ts = int(time.time() * 1000)
+            seq = last_seq
+            for item, (fx, fy, fc, flags) in zip(items, packed):
+                seq += 1
+                _SLOT.pack_into(self._buf, self._slot_offset(seq), seq, ts, fx, fy, fc, flags)
+                events.append({'seq': seq, 'ts': ts, 'x': item.get('x'), 'y': item.get('y'),
+                               'client_ts': item.get('client_ts')})
+            _HEADER.pack_into(self._buf, 0, version + 2, seq, capacity, slot_size)
+            # Ainda sob o lock: assinantes (ex: journal) recebem os lotes em ordem de seq
+            self._notify_subscribers(events)
+        return events
+
+    def restore(self, events):
+        events = sorted(events, key=lambda event: event['seq'])
+        with self._write_lock():
+            last_seq = _HEADER.unpack_from(self._buf, 0)[1]
+            # Outro worker já está usando o segmento: o histórico dele prevalece
+            if last_seq or not events:
+                return
+            version, last_seq, capacity, slot_size = self._begin_write()
+            for event in events[-capacity:]:
+                fx, flags_x = _pack_coord(event.get('x'), _HAS_X, _INT_X)
+                fy, flags_y = _pack_coord(event.get('y'), _HAS_Y, _INT_Y)
+                fc, flags_c = _pack_coord(event.get('client_ts'), _HAS_CLIENT_TS, _INT_CLIENT_TS)
+                _SLOT.pack_into(self._buf, self._slot_offset(event['seq']), event['seq'],
+                                event['ts'], fx, fy, fc, flags_x | flags_y | flags_c)
+            _HEADER.pack_into(self._buf, 0, version + 2, events[-1]['seq'], capacity, slot_size)
+
+    def _read_consistent(self, read):
+        """
+        Executa read() até obter uma leitura sem escrita concorrente (seqlock).
+        Após READ_SPINS tentativas lê sob o flock, corrigindo a versão ímpar
+        deixada por um escritor que morreu no meio da escrita.
+        """
+        for _ in range(self.READ_SPINS):
+            v1 = _HEADER.unpack_from(self._buf, 0)[0]
+            if v1 & 1:
+                time.sleep(0)
+                continue
+            result = read()
+            if _HEADER.unpack_from(self._buf, 0)[0] == v1:
+                return result
+        with self._write_lock():
+            version, last_seq, capacity, slot_size = _HEADER.unpack_from(self._buf, 0)
+            if version & 1:
+                logger.warning("Escrita interrompida no segmento de triggers; versão corrigida")
+                _HEADER.pack_into(self._buf, 0, version + 1, last_seq, capacity, slot_size)
+            return read()
+
+    def _snapshot(self):
+        """Cópia consistente (cabeçalho, slots) obtida sem lock via seqlock."""
+        return self._read_consistent(
+            lambda: bytes(self._buf[:_HEADER.size + self._capacity * _SLOT.size]))
+
+    def _read_slot(self, data, seq):
+        slot_seq, ts, fx, fy, fc, flags = _SLOT.unpack_from(data, self._slot_offset(seq))
+        return {
+            'seq': slot_seq,
+            'ts': ts,
+            'x': _unpack_coord(fx, flags, _HAS_X, _INT_X),
+            'y': _unpack_coord(fy, flags, _HAS_Y, _INT_Y),
+            'client_ts': _unpack_coord(fc, flags, _HAS_CLIENT_TS, _INT_CLIENT_TS)
+        }
+
+    def latest(self):
+        # Cabeçalho + um slot: não precisa copiar o log inteiro
+        def read():
+            last_seq = _HEADER.unpack_from(self._buf, 0)[1]
+            return self._read_slot(self._buf, last_seq) if last_seq else _empty_state()
+        return self._read_consistent(read)
+
+    def events_since(self, since):
+        data = self._snapshot()
+        last_seq = _HEADER.unpack_from(data, 0)[1]
+        first = max(since + 1, last_seq - self._capacity + 1, 1)
+        # Após restore() os slots abaixo do primeiro seq restaurado nunca foram gravados
+        events = [self._read_slot(data, seq) for seq in range(first, last_seq + 1)]
+        return [event for event in events if event['seq']], last_seq
+
+    def wait(self, predicate, timeout):
+        # Sem notificação entre processos: consulta o cabeçalho em intervalos curtos
+        deadline = time.monotonic() + timeout
+        while True:
+            state = self.latest()
+            remaining = deadline - time.monotonic()
+            if predicate(state) or remaining <= 0:
+                return state
+            time.sleep(min(self.poll_interval, remaining))
+
+    def unlink(self):
+        if sys.version_info < (3, 13):
+            # unlink() desregistra do resource_tracker o que _open_shm já desregistrou
+            from multiprocessing import resource_tracker
+            resource_tracker.register(self._shm._name, 'shared_memory')
+        self._shm.unlink()
+
+
+def create_trigger_store(kind='memory', capacity=1024, **options):
+    """Cria o backend de triggers pelo nome ('memory' ou 'shm')."""
+    kind = (kind or 'memory').lower()
+    if kind == 'memory':
+        return MemoryTriggerStore(capacity)
+    if kind == 'shm':
+        return SharedMemoryTriggerStore(capacity, **options)
+    raise ValueError(f"TRIGGER_STORE inválido: {kind}")
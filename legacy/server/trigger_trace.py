@@ -0,0 +1,124 @@
+"""
+Rastreamento da latência de cada trigger ao longo da cadeia
+hotkey_helper -> server -> painel (TRIGGER_TRACE=<arquivo>).
+
+O helper manda junto com o clique:
+  trace_id    - identificador do clique (string curta, ex: 16 hex)
+  client_mono - time.monotonic() do clique, em ms
+  sent_mono   - time.monotonic() do envio (sai da fila/spool do helper), em ms
+
+O servidor carimba, no mesmo relógio monotônico:
+  recv_mono      - chegada da requisição/datagrama
+  recorded_mono  - append no trigger store
+  deliver_mono   - primeira vez que o evento sai numa resposta para um
+                   cliente (/trigger-state, /trigger-wait ou /trigger-events)
+
+Na entrega, uma linha JSON por trigger é gravada no arquivo; trace_report.py
+resume os tempos por trecho. time.monotonic() é do sistema todo, então os
+trechos que cruzam processos só valem com helper e servidor na mesma máquina.
+Triggers que saem da janela de pendentes (ou ainda pendentes no encerramento)
+são gravados sem deliver_mono.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+TRACE_ID_MAX_LEN = 64
+
+_CLIENT_FIELDS = ('client_mono', 'sent_mono')
+
+
+def monotonic_ms():
+    return time.monotonic() * 1000
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def trace_id_from_payload(payload):
+    """trace_id enviado pelo cliente, ou None se ausente/inválido."""
+    trace_id = payload.get('trace_id')
+    if not isinstance(trace_id, str) or not trace_id or len(trace_id) > TRACE_ID_MAX_LEN:
+        return None
+    return trace_id
+
+
+def trace_from_payload(payload, recv_mono, transport):
+    """
+    Extrai os campos de rastreamento de um evento recebido; retorna None se o
+    cliente não mandou trace_id.
+    """
+    trace_id = trace_id_from_payload(payload)
+    if trace_id is None:
+        return None
+    trace = {'trace_id': trace_id, 'transport': transport}
+    for name in _CLIENT_FIELDS:
+        value = payload.get(name)
+        trace[name] = value if _is_number(value) else None
+    trace['recv_mono'] = recv_mono
+    return trace
+
+
+class TriggerTracer:
+    """Guarda os tempos de cada trigger rastreado até a primeira entrega."""
+
+    def __init__(self, path, max_pending=4096):
+        self.path = path
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending = OrderedDict()   # seq -> trace
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def recorded(self, events, traces):
+        """Associa cada evento gravado no store (mesma ordem) ao seu trace."""
+        now = monotonic_ms()
+        evicted = []
+        with self._lock:
+            for event, trace in zip(events, traces):
+                if trace is None:
+                    continue
+                trace['seq'] = event['seq']
+                trace['recorded_mono'] = now
+                self._pending[event['seq']] = trace
+            while len(self._pending) > self.max_pending:
+                evicted.append(self._pending.popitem(last=False)[1])
+            if evicted:
+                self._write(evicted)
+
+    def delivered(self, events, route):
+        """Marca a primeira entrega dos eventos rastreados presentes em `events`."""
+        if not self._pending:
+            return
+        now = monotonic_ms()
+        done = []
+        with self._lock:
+            for event in events:
+                trace = self._pending.pop(event.get('seq'), None)
+                if trace is not None:
+                    trace['deliver_mono'] = now
+                    trace['route'] = route
+                    done.append(trace)
+            if done:
+                self._write(done)
+
+    def _write(self, traces):
+        try:
+            self._file.writelines(json.dumps(t) + '\n' for t in traces)
+            self._file.flush()
+        except (OSError, ValueError) as e:
+            logger.error(f"Falha ao gravar trace de triggers em {self.path}: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._pending:
+                self._write(list(self._pending.values()))
+                self._pending.clear()
+            self._file.close()
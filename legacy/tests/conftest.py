@@ -0,0 +1,16 @@
+"""
+Os módulos de legacy/server e legacy/scripts são importados pelo nome (como
+quando executados de dentro da própria pasta).
+
+Uso (a partir de legacy/):
+  python -m pytest tests
+"""
+
+import os
+import sys
+
+_LEGACY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for _folder in ('server', 'scripts'):
+    _path = os.path.join(_LEGACY, _folder)
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
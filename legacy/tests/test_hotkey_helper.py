@@ -0,0 +1,92 @@
+import json
+import sys
+import time
+import types
+
+import pytest
+
+pytest.importorskip('requests')
+# O hook global do mouse só é usado em main(); fora do Windows/root não importa
+sys.modules.setdefault('mouse', types.ModuleType('mouse'))
+
+import hotkey_helper  # noqa: E402
+from hotkey_helper import TriggerSender, TriggerSpool  # noqa: E402
+
+
+def _event(i):
+    return {'x': i, 'y': i, 'client_ts': 1000 + i}
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_spool_trims_oldest_events(tmp_path):
+    path = tmp_path / 'spool.jsonl'
+    spool = TriggerSpool(str(path), max_events=3)
+    spool.append([_event(1), _event(2)])
+    spool.append([_event(3), _event(4), _event(5)])
+
+    assert spool.peek(10) == [_event(3), _event(4), _event(5)]
+    assert spool.discarded == 2
+    assert _lines(path) == [_event(3), _event(4), _event(5)]
+
+
+def test_spool_reload_skips_torn_line_and_trims(tmp_path):
+    path = tmp_path / 'spool.jsonl'
+    path.write_text(''.join(json.dumps(_event(i)) + '\n' for i in range(1, 5)) + '{"x": 5, "y"')
+
+    spool = TriggerSpool(str(path), max_events=2)
+    assert spool.peek(10) == [_event(3), _event(4)]
+    assert spool.discarded == 2
+
+
+def test_spool_remove_first_deletes_empty_file(tmp_path):
+    path = tmp_path / 'spool.jsonl'
+    spool = TriggerSpool(str(path))
+    spool.append([_event(1), _event(2)])
+
+    spool.remove_first(1)
+    assert _lines(path) == [_event(2)]
+    spool.remove_first(1)
+    assert len(spool) == 0 and not path.exists()
+
+
+@pytest.fixture
+def sender(tmp_path):
+    # Porta 9 (discard) sem listener: conexão recusada na hora
+    sender = TriggerSender(base_url='http://127.0.0.1:9', timeout=0.5,
+                           spool=TriggerSpool(str(tmp_path / 'spool.jsonl')), transport='http')
+    yield sender
+    sender._session.close()
+
+
+def test_retry_backoff_doubles_up_to_max(sender, monkeypatch):
+    monkeypatch.setattr(hotkey_helper.random, 'uniform', lambda a, b: b)
+    delays = []
+    for _ in range(10):
+        before = time.monotonic()
+        sender._schedule_retry()
+        delays.append(sender._next_retry - before)
+
+    expected = [min(hotkey_helper.RETRY_MAX_S, hotkey_helper.RETRY_BASE_S * 2 ** n) for n in range(10)]
+    assert delays == pytest.approx(expected, abs=0.05)
+
+
+def test_retry_backoff_jitter_stays_within_half_delay(sender):
+    for attempt in range(6):
+        before = time.monotonic()
+        sender._schedule_retry()
+        full = min(hotkey_helper.RETRY_MAX_S, hotkey_helper.RETRY_BASE_S * 2 ** attempt)
+        delay = sender._next_retry - before
+        assert full * 0.5 - 0.05 <= delay <= full + 0.05
+
+
+def test_failed_flush_keeps_spool_order_and_backs_off(sender):
+    sender.spool.append([_event(1), _event(2)])
+
+    sender._flush([(time.perf_counter(), _event(3))])
+
+    assert [e['x'] for e in sender.spool.peek(10)] == [1, 2, 3]
+    assert sender._retry_attempt == 1
+    assert sender._next_retry > time.monotonic()
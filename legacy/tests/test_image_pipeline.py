@@ -0,0 +1,60 @@
+import queue
+import threading
+
+import pytest
+
+pytest.importorskip('PIL')
+
+from PIL import Image  # noqa: E402
+
+from image_pipeline import ClickQueue, DuplicateFilter  # noqa: E402
+
+
+def test_click_queue_coalesces_into_last_pending():
+    clicks = ClickQueue(maxsize=2)
+    assert clicks.put(((1, 1), 1.0))
+    assert clicks.put(((2, 2), 2.0))
+    # Cheia: o clique novo toma o lugar do último pendente
+    assert not clicks.put(((3, 3), 3.0))
+    assert not clicks.put(((4, 4), 4.0))
+
+    assert clicks.coalesced == 2
+    assert clicks.get(timeout=0) == ((1, 1), 1.0)
+    assert clicks.get(timeout=0) == ((4, 4), 4.0)
+    with pytest.raises(queue.Empty):
+        clicks.get(timeout=0.01)
+
+
+def test_click_queue_close_drains_pending_then_returns_none():
+    clicks = ClickQueue(maxsize=4)
+    clicks.put(((1, 1), 1.0))
+    clicks.close()
+
+    assert clicks.get() == ((1, 1), 1.0)
+    assert clicks.get() is None
+
+
+def test_click_queue_close_wakes_waiting_worker():
+    clicks = ClickQueue(maxsize=4)
+    received = []
+    worker = threading.Thread(target=lambda: received.append(clicks.get(timeout=5)))
+    worker.start()
+    clicks.close()
+    worker.join(timeout=5)
+
+    assert received == [None]
+
+
+def test_duplicate_filter_keeps_newest_reference():
+    dedup = DuplicateFilter()
+    img = Image.new('RGB', (64, 64), 'white')
+    digest, ref = dedup.lookup('mon', img)
+    assert ref is None
+
+    # Gravação da captura mais antiga terminou por último
+    dedup.remember('mon', digest, 'new.png', 2.0)
+    dedup.remember('mon', digest, 'old.png', 1.0)
+    assert dedup.lookup('mon', img)[1] == 'new.png'
+
+    changed = Image.new('RGB', (64, 64), 'black')
+    assert dedup.lookup('mon', changed)[1] is None
@@ -0,0 +1,72 @@
+import json
+
+from trigger_journal import TriggerJournal
+
+
+def _event(seq):
+    return {'seq': seq, 'ts': 1000 + seq, 'x': seq, 'y': seq * 2, 'client_ts': None}
+
+
+def _write_lines(path, events, tail=b''):
+    with open(path, 'wb') as f:
+        for event in events:
+            f.write(json.dumps(event).encode() + b'\n')
+        f.write(tail)
+
+
+def test_replay_discards_torn_tail(tmp_path):
+    path = tmp_path / 'triggers.jsonl'
+    _write_lines(path, [_event(1), _event(2)], tail=b'{"seq": 3, "ts"')
+
+    journal = TriggerJournal(str(path))
+    assert [e['seq'] for e in journal.replay()] == [1, 2]
+    # A linha parcial sai do arquivo: o próximo append começa numa linha nova
+    assert path.read_bytes().endswith(b'\n')
+
+    journal.start()
+    journal.record([_event(3)])
+    journal.close()
+    assert [e['seq'] for e in TriggerJournal(str(path)).replay()] == [1, 2, 3]
+
+
+def test_replay_discards_complete_json_without_newline(tmp_path):
+    # JSON válido mas sem '\n': a escrita pode ter parado antes do fsync do grupo
+    path = tmp_path / 'triggers.jsonl'
+    _write_lines(path, [_event(1)], tail=json.dumps(_event(2)).encode())
+
+    assert [e['seq'] for e in TriggerJournal(str(path)).replay()] == [1]
+    assert path.read_bytes() == json.dumps(_event(1)).encode() + b'\n'
+
+
+def test_replay_merges_snapshot_and_tail_without_duplicates(tmp_path):
+    path = tmp_path / 'triggers.jsonl'
+    snapshot = {'seq': 3, 'events': [_event(1), _event(2), _event(3)]}
+    (tmp_path / 'triggers.jsonl.snapshot').write_text(json.dumps(snapshot))
+    # Journal não truncado depois do snapshot (crash entre os dois passos)
+    _write_lines(path, [_event(2), _event(3), _event(5), _event(4)])
+
+    events = TriggerJournal(str(path)).replay()
+    assert [e['seq'] for e in events] == [1, 2, 3, 4, 5]
+
+
+def test_replay_keeps_last_capacity_events(tmp_path):
+    path = tmp_path / 'triggers.jsonl'
+    _write_lines(path, [_event(seq) for seq in range(1, 11)])
+
+    events = TriggerJournal(str(path), capacity=4).replay()
+    assert [e['seq'] for e in events] == [7, 8, 9, 10]
+
+
+def test_close_writes_snapshot_and_truncates_journal(tmp_path):
+    path = tmp_path / 'triggers.jsonl'
+    journal = TriggerJournal(str(path), flush_interval=0.01)
+    journal.replay()
+    journal.start()
+    journal.record([_event(1), _event(2)])
+    journal.record([_event(3)])
+    journal.close()
+
+    assert path.read_bytes() == b''
+    snapshot = json.loads((tmp_path / 'triggers.jsonl.snapshot').read_text())
+    assert snapshot['seq'] == 3
+    assert [e['seq'] for e in TriggerJournal(str(path)).replay()] == [1, 2, 3]
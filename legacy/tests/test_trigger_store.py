@@ -0,0 +1,95 @@
+import os
+import uuid
+
+import pytest
+
+import trigger_store
+from trigger_store import MemoryTriggerStore, SharedMemoryTriggerStore, _HEADER
+
+
+@pytest.fixture(params=['memory', 'shm'])
+def store(request):
+    if request.param == 'memory':
+        yield MemoryTriggerStore(capacity=8)
+        return
+    pytest.importorskip('fcntl')
+    name = f'homolog_test_{uuid.uuid4().hex[:12]}'
+    shm_store = SharedMemoryTriggerStore(capacity=8, name=name)
+    yield shm_store
+    shm_store.unlink()
+    shm_store._lock_file.close()
+    os.remove(shm_store._lock_file.name)
+
+
+def _seqs(events):
+    return [e['seq'] for e in events]
+
+
+def test_append_many_assigns_consecutive_seqs(store):
+    first = store.append(1, 2)
+    batch = store.append_many([{'x': 3, 'y': 4}, {'x': 5.5, 'y': None, 'client_ts': 99}])
+
+    assert first['seq'] == 1
+    assert _seqs(batch) == [2, 3]
+    assert store.latest() == {'seq': 3, 'ts': batch[-1]['ts'], 'x': 5.5, 'y': None, 'client_ts': 99}
+    events, last_seq = store.events_since(1)
+    assert _seqs(events) == [2, 3] and last_seq == 3
+    assert events[0]['x'] == 3 and isinstance(events[0]['x'], int)
+
+
+def test_events_since_is_limited_to_capacity(store):
+    store.append_many([{'x': i, 'y': i} for i in range(12)])
+
+    events, last_seq = store.events_since(0)
+    assert last_seq == 12
+    assert _seqs(events) == list(range(5, 13))
+
+
+def test_subscribers_receive_batches_in_seq_order(store):
+    received = []
+    store.subscribe(lambda events: received.append(_seqs(events)))
+    store.append(1, 1)
+    store.append_many([{'x': 2, 'y': 2}, {'x': 3, 'y': 3}])
+
+    assert received == [[1], [2, 3]]
+
+
+def test_restore_orders_events_and_continues_seq(store):
+    restored = [{'seq': seq, 'ts': 100 + seq, 'x': seq, 'y': seq, 'client_ts': None}
+                for seq in (7, 5, 6)]
+    store.restore(restored)
+
+    assert store.latest()['seq'] == 7
+    events, last_seq = store.events_since(0)
+    assert _seqs(events) == [5, 6, 7] and last_seq == 7
+    assert store.append(1, 1)['seq'] == 8
+    assert _seqs(store.events_since(6)[0]) == [7, 8]
+
+
+def test_shm_restore_keeps_history_of_running_segment(store):
+    if not isinstance(store, SharedMemoryTriggerStore):
+        pytest.skip('só o segmento compartilhado sobrevive a outro worker')
+    store.append(1, 1)
+    store.restore([{'seq': 40, 'ts': 1, 'x': 0, 'y': 0, 'client_ts': None}])
+
+    assert store.latest()['seq'] == 1
+
+
+def test_shm_recovers_from_writer_killed_mid_write(store, monkeypatch):
+    if not isinstance(store, SharedMemoryTriggerStore):
+        pytest.skip('seqlock só existe no segmento compartilhado')
+    store.append(1, 1)
+    # Escritor morto entre _begin_write e o fim: versão fica ímpar
+    version, last_seq, capacity, slot_size = _HEADER.unpack_from(store._buf, 0)
+    _HEADER.pack_into(store._buf, 0, version + 1, last_seq, capacity, slot_size)
+    monkeypatch.setattr(SharedMemoryTriggerStore, 'READ_SPINS', 3)
+
+    assert store.latest()['seq'] == 1
+    assert _HEADER.unpack_from(store._buf, 0)[0] % 2 == 0
+    assert store.append(2, 2)['seq'] == 2
+    assert _HEADER.unpack_from(store._buf, 0)[0] % 2 == 0
+
+
+def test_create_trigger_store_rejects_unknown_kind():
+    with pytest.raises(ValueError):
+        trigger_store.create_trigger_store('redis')